@@ -3,15 +3,17 @@ import { FlipChartContainer } from '@/components/charts/FlipChartContainer'
 import { UrbanizationBarChart } from '@/components/charts/UrbanizationBarChart'
 import { PeaceParadoxScatter } from '@/components/charts/PeaceParadoxScatter'
 import { loadData } from '@/lib/loadData'
+import { loadChartData } from '@/lib/chartData'
 import { ClusterGlobeViewer } from '@/components/cluster-globe-viewer'
 import { ParticlesBackground } from '@/components/particles-background'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
 import { DashboardHeader, SectionHeader } from '@/components/dashboard-header'
 
 export default async function Page() {
-  const records = await loadData()
+  const [records, chartData] = await Promise.all([loadData(), loadChartData()])
 
-  const crimeData = records.map((d) => ({
+  // Only ship the raw crime columns when there is no pre-aggregated heatmap
+  const crimeData = chartData.crimeHeatmap ? [] : records.map((d) => ({
     giniCoefficient: d.giniCoefficient,
     urbanPopPerc: d.urbanPopPerc,
     perceptionsOfCriminality: d.perceptionsOfCriminality,
@@ -96,7 +98,10 @@ export default async function Page() {
                 title="Security Indicators"
                 description="Comparative analysis of peace and security metrics by urbanization level"
               />
-              <UrbanizationBarChart data={records} />
+              <UrbanizationBarChart
+                data={chartData.urbanizationBars ? undefined : records}
+                precomputed={chartData.urbanizationBars}
+              />
             </div>
 
             {/* Section 2: Correlation Deep Dive */}
@@ -114,7 +119,7 @@ export default async function Page() {
                 title="Crime & Safety Analysis"
                 description="Heatmap analysis of crime indicators by urbanization and inequality levels"
               />
-              <CrimeHeatmap data={crimeData} />
+              <CrimeHeatmap data={crimeData} precomputed={chartData.crimeHeatmap} />
             </div>
 
             {/* Section 4: Environmental Impact */}
@@ -123,7 +128,7 @@ export default async function Page() {
                 title="Environmental Impact"
                 description="Carbon emissions and renewable energy consumption patterns"
               />
-              <FlipChartContainer data={records} />
+              <FlipChartContainer data={records} renewableEnergy={chartData.renewableEnergy} />
             </div>
 
             {/* Section 5: Global Cluster Visualization */}
@@ -132,7 +137,7 @@ export default async function Page() {
                 title="Global Cluster Visualization"
                 description="Interactive 3D globe showing country clusters based on K-Means analysis"
               />
-              <ClusterGlobeViewer data={records} />
+              <ClusterGlobeViewer />
             </div>
           </div>
         </div>
@@ -2,9 +2,12 @@
 
 import { useMemo, useState } from 'react'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
+import type { CrimeHeatmapData } from '@/lib/chartData'
 
 interface CrimeHeatmapProps {
-  data: Array<{
+  // Pre-aggregated grid from public/chart-data; when present, data is not needed
+  precomputed?: CrimeHeatmapData | null
+  data?: Array<{
     giniCoefficient: number | null
     urbanPopPerc: number | null
     perceptionsOfCriminality: number | null
@@ -34,7 +37,7 @@ function getTertileLabel(value: number, tertiles: { low: number; mid: number; hi
   }
 }
 
-export function CrimeHeatmap({ data }: CrimeHeatmapProps) {
+export function CrimeHeatmap({ data = [], precomputed }: CrimeHeatmapProps) {
   const [selectedIndicator, setSelectedIndicator] = useState(0)
   const [hoveredCell, setHoveredCell] = useState<{
     rowLabel: string
@@ -54,6 +57,24 @@ export function CrimeHeatmap({ data }: CrimeHeatmapProps) {
   ]
 
   const heatmapData = useMemo(() => {
+    const cell = precomputed?.cells[indicatorMap[selectedIndicator].key]
+    if (precomputed && cell) {
+      const chartData = precomputed.rowOrder.map((rowLabel, rowIdx) => {
+        const row: Record<string, string | number> = { inequality: rowLabel }
+        precomputed.colOrder.forEach((colLabel, colIdx) => {
+          row[colLabel] = cell.means[rowIdx][colIdx] ?? 0
+        })
+        return row
+      })
+      return {
+        chartData,
+        colOrder: precomputed.colOrder,
+        rowOrder: precomputed.rowOrder,
+        minValue: cell.minValue,
+        maxValue: cell.maxValue,
+      }
+    }
+
     // Filter out null/undefined values, but allow 0
     const validData = data.filter(
       (d) =>
@@ -138,7 +159,7 @@ export function CrimeHeatmap({ data }: CrimeHeatmapProps) {
       minValue,
       maxValue,
     }
-  }, [data, selectedIndicator])
+  }, [data, precomputed, selectedIndicator])
 
   // Color interpolation function - red gradient for violence-related data
   const getColor = (value: number, min: number, max: number): string => {
@@ -5,12 +5,14 @@ import { Button } from '@/components/ui/button'
 import { UrbanCarbonScatter } from './UrbanCarbonScatter'
 import { RenewableEnergyArea } from './RenewableEnergyArea'
 import type { DataRecord } from '@/lib/loadData'
+import type { RenewableEnergyData } from '@/lib/chartData'
 
 interface FlipChartContainerProps {
   data: DataRecord[]
+  renewableEnergy?: RenewableEnergyData | null
 }
 
-export function FlipChartContainer({ data }: FlipChartContainerProps) {
+export function FlipChartContainer({ data, renewableEnergy }: FlipChartContainerProps) {
   const [isFlipped, setIsFlipped] = useState(false)
 
   return (
@@ -37,7 +39,7 @@ export function FlipChartContainer({ data }: FlipChartContainerProps) {
         <div className="flip-card-back">
           <div className="relative">
             <div className="relative">
-              <RenewableEnergyArea data={data} />
+              <RenewableEnergyArea data={renewableEnergy ? undefined : data} precomputed={renewableEnergy} />
               <Button
                 onClick={() => setIsFlipped(false)}
                 className="absolute top-20 right-6 z-20"
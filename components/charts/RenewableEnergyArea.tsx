@@ -13,9 +13,12 @@ import {
   Line,
 } from 'recharts'
 import type { DataRecord } from '@/lib/loadData'
+import type { RenewableEnergyData } from '@/lib/chartData'
 
 interface RenewableEnergyAreaProps {
-  data: DataRecord[]
+  data?: DataRecord[]
+  // Pre-aggregated yearly series from public/chart-data; skips client aggregation
+  precomputed?: RenewableEnergyData | null
 }
 
 interface YearlyData {
@@ -24,8 +27,12 @@ interface YearlyData {
   totalPopulation: number
 }
 
-export function RenewableEnergyArea({ data }: RenewableEnergyAreaProps) {
+export function RenewableEnergyArea({ data = [], precomputed }: RenewableEnergyAreaProps) {
   const chartData = useMemo(() => {
+    if (precomputed) {
+      return precomputed.yearly as YearlyData[]
+    }
+
     // Filter valid data
     const validData = data.filter(
       (d) =>
@@ -73,7 +80,7 @@ export function RenewableEnergyArea({ data }: RenewableEnergyAreaProps) {
     yearlyData.sort((a, b) => a.year - b.year)
 
     return yearlyData
-  }, [data])
+  }, [data, precomputed])
 
   if (chartData.length === 0) {
     return (
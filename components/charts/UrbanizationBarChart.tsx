@@ -13,9 +13,12 @@ import {
   ResponsiveContainer,
 } from 'recharts'
 import type { DataRecord } from '@/lib/loadData'
+import type { UrbanizationBarsData } from '@/lib/chartData'
 
 interface UrbanizationBarChartProps {
-  data: DataRecord[]
+  data?: DataRecord[]
+  // Pre-aggregated bars from public/chart-data; skips client normalisation
+  precomputed?: UrbanizationBarsData | null
 }
 
 interface IndicatorMapping {
@@ -52,8 +55,12 @@ interface ChartDataPoint {
   'High Urbanization (>75%)': number
 }
 
-export function UrbanizationBarChart({ data }: UrbanizationBarChartProps) {
+export function UrbanizationBarChart({ data = [], precomputed }: UrbanizationBarChartProps) {
   const chartData = useMemo(() => {
+    if (precomputed) {
+      return precomputed.chartData as unknown as ChartDataPoint[]
+    }
+
     // Filter valid data with all required fields
     const validData = data.filter(
       (d) =>
@@ -168,7 +175,7 @@ export function UrbanizationBarChart({ data }: UrbanizationBarChartProps) {
     })
 
     return chartData
-  }, [data])
+  }, [data, precomputed])
 
   const CustomTooltip = ({ active, payload, label }: any) => {
     if (active && payload && payload.length) {
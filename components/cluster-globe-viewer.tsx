@@ -3,12 +3,10 @@
 import { useEffect, useRef, useState, useMemo } from 'react'
 import { Card, CardContent } from '@/components/ui/card'
 import { countryCoordinates } from '@/lib/countryCoordinates'
-import type { DataRecord } from '@/lib/loadData'
-import { clusterCountries } from '@/lib/clustering'
+import { loadChoropleth, type Choropleth, type ChoroplethLayer } from '@/lib/choropleth'
 
-interface ClusterGlobeViewerProps {
-  data: DataRecord[]
-}
+// Packed layers the tooltips read (public/chart-data/choropleth)
+const CLUSTER_LAYERS = ['urbanPopPerc', 'totalPop', 'giniCoefficient', 'overallScore']
 
 // Cluster colors - Red for Volatile, Green for Stable
 const CLUSTER_COLORS = {
@@ -67,40 +65,67 @@ const normalizeCountryName = (name: string): string => {
   return countryNameMap[name] || name
 }
 
-export function ClusterGlobeViewer({ data }: ClusterGlobeViewerProps) {
+// Mean over all years of one country's column in a year-major layer (NaN = missing)
+const countryMean = (layer: ChoroplethLayer | undefined, nCountries: number, i: number): number | null => {
+  if (!layer) return null
+  let sum = 0
+  let count = 0
+  for (let k = i; k < layer.values.length; k += nCountries) {
+    const v = layer.values[k]
+    if (!Number.isNaN(v)) {
+      sum += v
+      count++
+    }
+  }
+  return count > 0 ? sum / count : null
+}
+
+export function ClusterGlobeViewer() {
   const globeInstanceRef = useRef<any>(null)
   const containerRef = useRef<HTMLDivElement>(null)
   const countriesGeoJsonRef = useRef<any>(null)
   const isGlobeInitializedRef = useRef(false)
   const [isGlobeReady, setIsGlobeReady] = useState(false)
 
-  // Perform clustering (same as PeaceParadoxScatter)
-  const countryProfiles = useMemo(() => clusterCountries(data), [data])
+  // Cluster labels and per-year layers from the packed manifest; no records are shipped
+  const [choropleth, setChoropleth] = useState<Choropleth | null>(null)
+  const [loadError, setLoadError] = useState<string | null>(null)
+  useEffect(() => {
+    loadChoropleth(CLUSTER_LAYERS)
+      .then(setChoropleth)
+      .catch((error: Error) => {
+        console.error('Failed to load choropleth layers:', error)
+        setLoadError(error.message)
+      })
+  }, [])
 
-  // Convert country profiles to map with display data
+  // Labels were assigned offline by public/Data/cluster_countries.py; tooltips show
+  // each country's mean over all years
   const countryClusterData = useMemo(() => {
     const countryMap = new Map<string, any>()
-    
-    countryProfiles.forEach((profile, country) => {
-      const coords = countryCoordinates[country]
-      if (!coords) return
-      
-      const clusterLabel = profile.clusterLabel
+    if (!choropleth) return countryMap
+
+    const { countries, clusterLabels, layers } = choropleth
+    const n = countries.length
+    countries.forEach((country, i) => {
+      const clusterLabel = clusterLabels[i]
+      if (!clusterLabel || !countryCoordinates[country]) return
+
       const clusterColor = CLUSTER_COLORS[clusterLabel as keyof typeof CLUSTER_COLORS] || CLUSTER_COLORS['Unknown']
-      
+
       countryMap.set(country, {
-        country: profile.country,
+        country,
         clusterLabel,
         clusterColor,
-        urbanPopPerc: profile.urbanPopPerc,
-        totalPop: profile.totalPop,
-        giniCoefficient: profile.giniCoefficient,
-        overallScore: profile.overallScore,
+        urbanPopPerc: countryMean(layers.urbanPopPerc, n, i),
+        totalPop: countryMean(layers.totalPop, n, i),
+        giniCoefficient: countryMean(layers.giniCoefficient, n, i),
+        overallScore: countryMean(layers.overallScore, n, i),
       })
     })
-    
+
     return countryMap
-  }, [countryProfiles])
+  }, [choropleth])
 
   // Cluster statistics
   const clusterStats = useMemo(() => {
@@ -317,7 +342,12 @@ export function ClusterGlobeViewer({ data }: ClusterGlobeViewerProps) {
         <div className="relative w-full h-[600px] md:h-[700px] overflow-hidden rounded-xl border-2 border-border/30 bg-black">
           <div ref={containerRef} className="w-full h-full" />
           
-          {!isGlobeReady && (
+          {loadError ? (
+            <div className="absolute inset-0 z-20 flex flex-col items-center justify-center gap-2 bg-black/80 px-6 text-center">
+              <div className="text-white text-lg font-semibold">Could not load the cluster data</div>
+              <div className="text-sm text-white/70">{loadError}</div>
+            </div>
+          ) : (!isGlobeReady || !choropleth) && (
             <div className="absolute inset-0 flex items-center justify-center bg-black/80">
               <div className="text-white text-lg animate-pulse">Loading Globe...</div>
             </div>
@@ -3,12 +3,11 @@
 import { useEffect, useRef, useState, useMemo, useCallback } from 'react'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
 import { countryCoordinates } from '@/lib/countryCoordinates'
-import type { DataRecord } from '@/lib/loadData'
+import { loadChoropleth, type Choropleth } from '@/lib/choropleth'
 import { Play, Pause, RotateCcw, FastForward, ChevronLeft, ChevronRight } from 'lucide-react'
 
-interface GlobeGLViewerProps {
-  data: DataRecord[]
-}
+// Packed layers the globe colours and tooltips read (public/chart-data/choropleth)
+const GLOBE_LAYERS = ['gdp', 'urbanPopPerc', 'popDensSqKm', 'totalPop']
 
 // Heat map color interpolation
 const interpolateColor = (color1: string, color2: string, t: number): string => {
@@ -155,7 +154,7 @@ const formatGrowth = (growth: number): string => {
   return `${sign}${growth.toFixed(1)}%`
 }
 
-export function GlobeGLViewer({ data }: GlobeGLViewerProps) {
+export function GlobeGLViewer() {
   const globeInstanceRef = useRef<any>(null)
   const containerRef = useRef<HTMLDivElement>(null)
   const countriesGeoJsonRef = useRef<any>(null)
@@ -168,68 +167,93 @@ export function GlobeGLViewer({ data }: GlobeGLViewerProps) {
   const [isGlobeReady, setIsGlobeReady] = useState(false)
   const playbackRef = useRef<NodeJS.Timeout | null>(null)
 
-  // Get available years
-  const availableYears = useMemo(() => {
-    const years = data
-      .map((d) => d.year)
-      .filter((y): y is number => y !== null)
-      .filter((y, idx, arr) => arr.indexOf(y) === idx)
-      .sort((a, b) => a - b)
-    return years.length > 0 ? years : [2020]
-  }, [data])
-
-  const baseYear = availableYears[0] // 2008
-
-  // Precompute base year GDP for growth calculation
-  const baseYearGDP = useMemo(() => {
-    const baseData = data.filter(d => d.year === baseYear && d.gdp != null && d.gdp > 0)
-    const map = new Map<string, number>()
-    baseData.forEach(d => map.set(d.country, d.gdp!))
-    return map
-  }, [data, baseYear])
-
-  // Precompute all year data with growth rates and percentiles
+  // Per-year layers as Float32Array views; no per-country records are shipped
+  const [choropleth, setChoropleth] = useState<Choropleth | null>(null)
+  const [loadError, setLoadError] = useState<string | null>(null)
+  useEffect(() => {
+    loadChoropleth(GLOBE_LAYERS)
+      .then(setChoropleth)
+      .catch((error: Error) => {
+        console.error('Failed to load choropleth layers:', error)
+        setLoadError(error.message)
+      })
+  }, [])
+
+  // Get available years (empty until the layers have loaded)
+  const availableYears = useMemo(() => choropleth?.years ?? [], [choropleth])
+
+  const baseYear = availableYears[0] ?? selectedYear // 2008
+
+  // Precompute all year data with growth rates and percentiles, straight from the layers
   const allYearsData = useMemo(() => {
     const yearDataMap = new Map<number, Map<string, any>>()
-    
+    if (!choropleth) return yearDataMap
+
+    const { countries, countryCodes, clusterLabels, yearValues } = choropleth
+    const baseRow = yearValues('gdp', baseYear)
+    const valueAt = (row: Float32Array | null, i: number): number | null =>
+      row && !Number.isNaN(row[i]) ? row[i] : null
+
     availableYears.forEach(year => {
-      const yearData = data.filter(
-        (d) => d.year === year && d.gdp != null && !isNaN(d.gdp) && d.gdp > 0
-      )
-      
-      // Calculate percentiles for this year
-      const sortedGDP = yearData.map(d => d.gdp!).sort((a, b) => a - b)
+      const countryMap = new Map<string, any>()
+      yearDataMap.set(year, countryMap)
+      const gdpRow = yearValues('gdp', year)
+      if (!gdpRow) return
+      const urbanRow = yearValues('urbanPopPerc', year)
+      const densityRow = yearValues('popDensSqKm', year)
+      const popRow = yearValues('totalPop', year)
+
+      // Countries with a positive GDP this year (NaN marks a missing cell)
+      const present: number[] = []
+      gdpRow.forEach((gdp, i) => {
+        if (gdp > 0) present.push(i)
+      })
+
+      // Calculate percentiles for this year (binary search in the sorted GDPs)
+      const sortedGDP = Float64Array.from(present, i => gdpRow[i]).sort()
       const getPercentile = (gdp: number): number => {
-        const idx = sortedGDP.findIndex(g => g >= gdp)
-        return (idx / sortedGDP.length) * 100
+        let lo = 0
+        let hi = sortedGDP.length
+        while (lo < hi) {
+          const mid = (lo + hi) >> 1
+          if (sortedGDP[mid] < gdp) lo = mid + 1
+          else hi = mid
+        }
+        return (lo / sortedGDP.length) * 100
       }
-      
-      const countryMap = new Map<string, any>()
-      
-      yearData.forEach(record => {
-        const coords = countryCoordinates[record.country]
+
+      present.forEach(i => {
+        const country = countries[i]
+        const coords = countryCoordinates[country]
         if (!coords) return
-        
-        const gdp = record.gdp!
-        const baseGDP = baseYearGDP.get(record.country)
-        
+
+        const gdp = gdpRow[i]
+        const base = valueAt(baseRow, i)
+        const baseGDP = base !== null && base > 0 ? base : undefined
+
         // Calculate growth from base year
         let growthPercent = 0
-        if (baseGDP && baseGDP > 0) {
+        if (baseGDP) {
           growthPercent = ((gdp - baseGDP) / baseGDP) * 100
         }
-        
+
         // Calculate percentile within this year
         const percentile = getPercentile(gdp)
-        
+
         // Get colors for all modes
         const growthColor = getGrowthColor(growthPercent)
         const percentileColor = getPercentileColor(percentile)
-        const clusterLabel = record.clusterLabel || 'Unknown'
+        const clusterLabel = clusterLabels[i] || 'Unknown'
         const clusterColor = CLUSTER_COLORS[clusterLabel as keyof typeof CLUSTER_COLORS] || CLUSTER_COLORS['Unknown']
-        
-        countryMap.set(record.country, {
-          ...record,
+
+        countryMap.set(country, {
+          country,
+          countryCode: countryCodes[i],
+          year,
+          gdp,
+          urbanPopPerc: valueAt(urbanRow, i),
+          popDensSqKm: valueAt(densityRow, i),
+          totalPop: valueAt(popRow, i),
           growthPercent,
           percentile,
           growthColor,
@@ -239,12 +263,10 @@ export function GlobeGLViewer({ data }: GlobeGLViewerProps) {
           baseGDP,
         })
       })
-      
-      yearDataMap.set(year, countryMap)
     })
-    
+
     return yearDataMap
-  }, [data, availableYears, baseYearGDP])
+  }, [choropleth, availableYears, baseYear])
 
   // Get current year's country data
   const currentYearCountryData = useMemo(() => {
@@ -752,7 +774,12 @@ export function GlobeGLViewer({ data }: GlobeGLViewerProps) {
         <div className="relative w-full h-[600px] md:h-[700px] overflow-hidden rounded-xl border-2 border-border/30 bg-black">
           <div ref={containerRef} className="w-full h-full" />
           
-          {!isGlobeReady && (
+          {loadError ? (
+            <div className="absolute inset-0 z-20 flex flex-col items-center justify-center gap-2 bg-black/80 px-6 text-center">
+              <div className="text-white text-lg font-semibold">Could not load the globe data</div>
+              <div className="text-sm text-white/70">{loadError}</div>
+            </div>
+          ) : (!isGlobeReady || !choropleth) && (
             <div className="absolute inset-0 flex items-center justify-center bg-black/80">
               <div className="text-white text-lg animate-pulse">Loading Globe...</div>
             </div>
@@ -0,0 +1,55 @@
+import { promises as fs } from 'fs'
+import path from 'path'
+
+// Written by public/Visualization/export_chart_data.py; bump together with SCHEMA_VERSION there
+export const CHART_DATA_VERSION = 1
+
+const CHART_DATA_DIR = path.join(process.cwd(), 'public', 'chart-data', `v${CHART_DATA_VERSION}`)
+
+export type CrimeHeatmapData = {
+  rowOrder: string[]
+  colOrder: string[]
+  indicators: { key: string; label: string }[]
+  cells: Record<
+    string,
+    { means: (number | null)[][]; counts: number[][]; minValue: number; maxValue: number }
+  >
+}
+
+export type RenewableEnergyData = {
+  yearly: { year: number; renewableEnergyPercent: number; totalPopulation: number }[]
+}
+
+export type UrbanizationBarsData = {
+  groups: string[]
+  chartData: ({ indicator: string } & Record<string, number | string>)[]
+}
+
+export type ChartData = {
+  crimeHeatmap: CrimeHeatmapData | null
+  renewableEnergy: RenewableEnergyData | null
+  urbanizationBars: UrbanizationBarsData | null
+}
+
+async function readChartFile<T>(name: string): Promise<T | null> {
+  try {
+    const payload = JSON.parse(await fs.readFile(path.join(CHART_DATA_DIR, name), 'utf-8'))
+    return payload.version === CHART_DATA_VERSION ? (payload as T) : null
+  } catch (error) {
+    return null
+  }
+}
+
+/**
+ * Load the pre-aggregated chart payloads. Any file that is missing or was
+ * written for another schema version comes back as null, and the matching
+ * component falls back to aggregating the raw records itself.
+ */
+export async function loadChartData(): Promise<ChartData> {
+  const [crimeHeatmap, renewableEnergy, urbanizationBars] = await Promise.all([
+    readChartFile<CrimeHeatmapData>('crime-heatmap.json'),
+    readChartFile<RenewableEnergyData>('renewable-energy.json'),
+    readChartFile<UrbanizationBarsData>('urbanization-bars.json'),
+  ])
+  return { crimeHeatmap, renewableEnergy, urbanizationBars }
+}
@@ -0,0 +1,114 @@
+// Packed per-year choropleth layers written by public/Visualization/export_choropleth.py.
+// Each layer is a year-major Float32Array (years x countries); one year of the
+// globe is a subarray view, so scrubbing the year slider copies nothing.
+
+// Bump together with SCHEMA_VERSION in export_choropleth.py
+export const CHOROPLETH_VERSION = 1
+
+const CHOROPLETH_URL = `/chart-data/choropleth/v${CHOROPLETH_VERSION}`
+
+type ChoroplethManifest = {
+  version: number
+  byteOrder: 'little'
+  countries: string[]
+  countryCodes: string[]
+  clusterLabels?: (string | null)[] | null
+  years: number[]
+  indicators: { key: string; column: string; file: string; min: number | null; max: number | null }[]
+}
+
+export type ChoroplethLayer = {
+  key: string
+  min: number | null
+  max: number | null
+  values: Float32Array
+}
+
+export type Choropleth = {
+  countries: string[]
+  countryCodes: string[]
+  /** Cluster label per country (same order as `countries`), null when unlabelled */
+  clusterLabels: (string | null)[]
+  years: number[]
+  layers: Record<string, ChoroplethLayer>
+  countryIndex: Map<string, number>
+  /** One value per country (NaN = missing) for `year`, as a view into the layer */
+  yearValues: (key: string, year: number) => Float32Array | null
+  value: (key: string, country: string, year: number) => number | null
+}
+
+const LITTLE_ENDIAN = new Uint8Array(new Uint16Array([1]).buffer)[0] === 1
+
+async function fetchFloat32(url: string): Promise<Float32Array> {
+  const response = await fetch(url)
+  if (!response.ok) throw new Error(`Failed to load ${url} (${response.status})`)
+  const buffer = await response.arrayBuffer()
+  if (LITTLE_ENDIAN) return new Float32Array(buffer)
+
+  // Big-endian hosts are rare but would misread the file without a swap
+  const view = new DataView(buffer)
+  const values = new Float32Array(buffer.byteLength / 4)
+  for (let i = 0; i < values.length; i++) values[i] = view.getFloat32(i * 4, true)
+  return values
+}
+
+let manifestPromise: Promise<ChoroplethManifest> | null = null
+
+function loadManifest(): Promise<ChoroplethManifest> {
+  if (!manifestPromise) {
+    manifestPromise = fetch(`${CHOROPLETH_URL}/manifest.json`).then(res => {
+      if (!res.ok) throw new Error(`Choropleth manifest missing (${res.status})`)
+      return res.json()
+    })
+    manifestPromise.catch(() => {
+      manifestPromise = null
+    })
+  }
+  return manifestPromise
+}
+
+/** Load the given indicator layers (DataRecord keys, e.g. 'gdp', 'urbanPopPerc'). */
+export async function loadChoropleth(keys: string[]): Promise<Choropleth> {
+  const manifest = await loadManifest()
+  const byKey = new Map(manifest.indicators.map(ind => [ind.key, ind]))
+
+  const layers: Record<string, ChoroplethLayer> = {}
+  await Promise.all(
+    keys.map(async key => {
+      const meta = byKey.get(key)
+      if (!meta) throw new Error(`No choropleth layer for ${key}`)
+      const values = await fetchFloat32(`${CHOROPLETH_URL}/${meta.file}`)
+      layers[key] = { key, min: meta.min, max: meta.max, values }
+    })
+  )
+
+  const nCountries = manifest.countries.length
+  const countryIndex = new Map<string, number>()
+  manifest.countries.forEach((name, i) => countryIndex.set(name, i))
+  manifest.countryCodes.forEach((code, i) => countryIndex.set(code, i))
+  const yearIndex = new Map(manifest.years.map((year, i) => [year, i]))
+
+  const yearValues = (key: string, year: number): Float32Array | null => {
+    const layer = layers[key]
+    const y = yearIndex.get(year)
+    if (!layer || y === undefined) return null
+    return layer.values.subarray(y * nCountries, (y + 1) * nCountries)
+  }
+
+  return {
+    countries: manifest.countries,
+    countryCodes: manifest.countryCodes,
+    clusterLabels: manifest.clusterLabels ?? manifest.countries.map(() => null),
+    years: manifest.years,
+    layers,
+    countryIndex,
+    yearValues,
+    value: (key, country, year) => {
+      const row = yearValues(key, year)
+      const c = countryIndex.get(country)
+      if (!row || c === undefined) return null
+      const v = row[c]
+      return Number.isNaN(v) ? null : v
+    },
+  }
+}
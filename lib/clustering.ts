@@ -146,7 +146,24 @@ function kMeans(data: number[][], k: number, maxIterations: number = 300): numbe
 }
 
 // Perform clustering on country profiles
+const CLUSTER_LABELS: CountryProfile['clusterLabel'][] = ['Stable Urbanizers', 'Volatile Urbanizers']
+
+const isClusterLabel = (label: string): label is CountryProfile['clusterLabel'] =>
+  (CLUSTER_LABELS as string[]).includes(label)
+
 export function clusterCountries(data: DataRecord[]): Map<string, CountryProfile> {
+  // Labels written offline by public/Data/cluster_countries.py (Cluster_Label column)
+  const precomputed = new Map<string, CountryProfile['clusterLabel']>()
+  let allLabelled = data.length > 0
+  data.forEach((d) => {
+    if (!d.country || d.country.trim() === '') return
+    if (isClusterLabel(d.clusterLabel)) {
+      precomputed.set(d.country, d.clusterLabel)
+    } else {
+      allLabelled = false
+    }
+  })
+
   // Group by country and calculate averages for ALL numeric fields
   type CountryAggregation = Record<keyof DataRecord, number[]> & { counts: number }
   const countryMap = new Map<string, Partial<CountryAggregation>>()
@@ -232,6 +249,16 @@ export function clusterCountries(data: DataRecord[]): Map<string, CountryProfile
     return new Map()
   }
 
+  // Skip k-means entirely when every record already carries its cluster
+  if (allLabelled) {
+    const result = new Map<string, CountryProfile>()
+    profiles.forEach(p => {
+      p.clusterLabel = precomputed.get(p.country)!
+      result.set(p.country, p)
+    })
+    return result
+  }
+
   console.log(`Clustering ${profiles.length} countries using ${ALL_NUMERIC_FIELDS.length} indicators`)
 
   // Extract features for clustering
@@ -0,0 +1,61 @@
+// Client for the local query service in public/Data/serve.py (a stand-in for
+// the production data API). Column names are the canonical snake_case names
+// from public/Data/dataset.py, e.g. 'ren_energy_cons_perc'.
+
+const DATA_API_URL = process.env.DATA_API_URL || 'http://127.0.0.1:8765'
+
+export type PanelQuery = {
+  countries?: string[]
+  yearFrom?: number
+  yearTo?: number
+  indicators?: string[]
+}
+
+export type AggregateQuery = PanelQuery & {
+  groupBy?: ('year' | 'country' | 'cluster_label' | 'gini_tertile' | 'urban_tertile')[]
+  weight?: string
+}
+
+export type SliceResponse = {
+  rows: number
+  columns: Record<string, (number | string | null)[]>
+}
+
+export type AggregateResponse = {
+  groups: number
+  keys: Record<string, (number | string)[]>
+  rows: number[]
+  weight: string | null
+  stats: Record<string, { count: number[]; mean: (number | null)[]; wmean?: (number | null)[] }>
+}
+
+function toSearchParams(query: AggregateQuery): URLSearchParams {
+  const params = new URLSearchParams()
+  if (query.countries?.length) params.set('countries', query.countries.join(','))
+  if (query.yearFrom != null) params.set('year_from', String(query.yearFrom))
+  if (query.yearTo != null) params.set('year_to', String(query.yearTo))
+  if (query.indicators?.length) params.set('indicators', query.indicators.join(','))
+  if (query.groupBy?.length) params.set('group_by', query.groupBy.join(','))
+  if (query.weight) params.set('weight', query.weight)
+  return params
+}
+
+async function getJson<T>(endpoint: string, query: AggregateQuery): Promise<T> {
+  const url = `${DATA_API_URL}${endpoint}?${toSearchParams(query)}`
+  const response = await fetch(url, { next: { revalidate: 60 } })
+  if (!response.ok) {
+    const detail = await response.json().catch(() => null)
+    throw new Error(`Data API ${endpoint} failed (${response.status}): ${detail?.error ?? response.statusText}`)
+  }
+  return (await response.json()) as T
+}
+
+/** Rows for the given countries/years with only the requested indicators. */
+export function fetchSlice(query: PanelQuery = {}): Promise<SliceResponse> {
+  return getJson<SliceResponse>('/slice', query)
+}
+
+/** Per-group count/mean (and weighted mean when `weight` is set) of each indicator. */
+export function fetchAggregate(query: AggregateQuery = {}): Promise<AggregateResponse> {
+  return getJson<AggregateResponse>('/aggregate', query)
+}
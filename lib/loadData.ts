@@ -1,5 +1,6 @@
 import { promises as fs } from 'fs'
 import path from 'path'
+import { loadClassification } from './regions'
 
 export type DataRecord = {
   // Non-numeric identifiers
@@ -214,6 +215,9 @@ export async function loadData(csvPath?: string): Promise<DataRecord[]> {
   // Log headers for debugging
   console.log('CSV Headers:', headers.slice(0, 10), '...')
 
+  // Country vs. aggregate comes from the classification table when it exists
+  const classification = await loadClassification()
+
   const records: DataRecord[] = []
   for (let i = 1; i < lines.length; i++) {
     const row = lines[i]
@@ -232,11 +236,17 @@ export async function loadData(csvPath?: string): Promise<DataRecord[]> {
     
     const normalized = normalizeRecord(record)
     
-    // Filter out invalid records (summary rows, empty countries, etc.)
-    if (normalized.country && 
-        normalized.country.trim() !== '' && 
-        normalized.year != null &&
-        !normalized.country.toLowerCase().includes('ultra-urban') &&
+    if (!normalized.country || normalized.country.trim() === '' || normalized.year == null) continue
+
+    if (classification) {
+      if (classification.isCountry(getValue(record, 'Country_Code', 'country_code'), normalized.country)) {
+        records.push(normalized)
+      }
+      continue
+    }
+
+    // Without the table, filter out summary rows by name
+    if (!normalized.country.toLowerCase().includes('ultra-urban') &&
         !normalized.country.toLowerCase().includes('average') &&
         !normalized.country.toLowerCase().includes('summary') &&
         !normalized.country.toLowerCase().includes('total') &&
@@ -273,4 +283,3 @@ async function resolveCsvPath() {
     'CSV file not found. Place it at /public/data/data.csv or /public/Data/combined_urbanization_life_quality_2008_2020.csv'
   )
 }
-
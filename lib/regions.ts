@@ -0,0 +1,81 @@
+import { promises as fs } from 'fs'
+import path from 'path'
+
+// Country/aggregate classification and region / income-group rollups written
+// by public/Data/regions.py. Server-side only, like loadData.
+
+// Bump together with SCHEMA_VERSION in regions.py
+export const REGIONS_VERSION = 1
+
+const REGIONS_DIR = path.join(process.cwd(), 'public', 'chart-data', 'regions', `v${REGIONS_VERSION}`)
+
+export type RollupLevel = 'world' | 'region' | 'income_group'
+
+export type CodeInfo = {
+  name: string
+  kind: 'country' | 'aggregate'
+  region: string | null
+  incomeGroup: string | null
+  /** For source aggregates matching one of our rollups, e.g. 'region:South Asia' */
+  rollup: string | null
+}
+
+export type Classification = {
+  codes: Record<string, CodeInfo>
+  members: { region: Record<string, string[]>; incomeGroup: Record<string, string[]> }
+  /** Whether a code (or, failing that, a name) is a real country rather than an aggregate */
+  isCountry: (code: string | undefined, name?: string) => boolean
+}
+
+export type RegionRollups = {
+  years: number[]
+  indicators: string[]
+  /** Indicators that are totals; the rest are population-weighted means */
+  sum: string[]
+  values: Record<RollupLevel, Record<string, Record<string, (number | null)[]>>>
+}
+
+let classificationPromise: Promise<Classification | null> | null = null
+
+/** The classification table, or null when regions.py has not been run. */
+export function loadClassification(): Promise<Classification | null> {
+  if (!classificationPromise) {
+    classificationPromise = fs
+      .readFile(path.join(REGIONS_DIR, 'classification.json'), 'utf-8')
+      .then(raw => {
+        const parsed = JSON.parse(raw) as Pick<Classification, 'codes' | 'members'>
+        const countryNames = new Set(
+          Object.values(parsed.codes)
+            .filter(info => info.kind === 'country')
+            .map(info => info.name)
+        )
+        return {
+          ...parsed,
+          isCountry: (code, name) => {
+            const info = code ? parsed.codes[code] : undefined
+            if (info) return info.kind === 'country'
+            return name != null && countryNames.has(name)
+          },
+        } as Classification
+      })
+      .catch(() => null)
+  }
+  return classificationPromise
+}
+
+export async function loadRegionRollups(): Promise<RegionRollups> {
+  const raw = await fs.readFile(path.join(REGIONS_DIR, 'rollups.json'), 'utf-8')
+  return JSON.parse(raw)
+}
+
+/** One value per year of `indicator` (snake_case) for a rollup group, e.g. ('region', 'South Asia'). */
+export function rollupSeries(
+  rollups: RegionRollups,
+  level: RollupLevel,
+  group: string,
+  indicator: string
+): { year: number; value: number | null }[] {
+  const values = rollups.values[level]?.[group]?.[indicator]
+  if (!values) return []
+  return rollups.years.map((year, i) => ({ year, value: values[i] }))
+}
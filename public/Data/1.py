@@ -1,38 +1,42 @@
-import pandas as pd
+import argparse
 import os
 
-# -------------------- CONFIG: update these paths --------------------
-main_file = r"D:\Study Stuff\Semester\Projects\5th Semester\DV\UI\public\Data\main.csv"
-gdp_file = r"D:\Study Stuff\Semester\Projects\5th Semester\DV\UI\public\Data\gdp.csv"
-output_file = r"D:\Study Stuff\Semester\Projects\5th Semester\DV\UI\public\Data\final_with_gdp.csv"
-# --------------------------------------------------------------------
+from instrument import stage
+from merge import full_gdp_merge, incremental_gdp_merge
 
-# ---- READ FILES ----
-main_df = pd.read_csv(main_file)
-gdp_df = pd.read_csv(gdp_file, usecols=["country_code", "gdp", "year"])  # only required columns
+# -------------------- CONFIG: defaults resolve next to this script --------------------
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# ---- RENAME GDP COLUMNS TO MATCH MAIN ----
-gdp_df = gdp_df.rename(columns={
-    "country_code": "Country_Code",
-    "year": "Year"
-})
-
-# ---- NORMALIZE: remove extra spaces and ensure uppercase for codes ----
-main_df["Country_Code"] = main_df["Country_Code"].astype(str).str.strip().str.upper()
-gdp_df["Country_Code"] = gdp_df["Country_Code"].astype(str).str.strip().str.upper()
-
-# ---- ENSURE YEAR IS INTEGER ----
-main_df["Year"] = main_df["Year"].astype(int)
-gdp_df["Year"] = gdp_df["Year"].astype(int)
-
-# ---- MERGE ----
-final_df = main_df.merge(
-    gdp_df,
-    on=["Country_Code", "Year"],
-    how="left"
+parser = argparse.ArgumentParser(
+    description="Attach GDP from gdp.csv to main.csv. For N sources in one pass use merge.py."
 )
-
-# ---- SAVE FINAL CSV ----
-final_df.to_csv(output_file, index=False)
-
-print("✓ Merge complete. Final file saved as:", output_file)
+parser.add_argument("--main", default=os.path.join(DATA_DIR, "main.csv"))
+parser.add_argument("--gdp", default=os.path.join(DATA_DIR, "gdp.csv"))
+parser.add_argument("--out", default=os.path.join(DATA_DIR, "final_with_gdp.csv"))
+parser.add_argument("--full", action="store_true", help="Re-read everything and rewrite from scratch")
+args = parser.parse_args()
+
+main_file = args.main
+gdp_file = args.gdp
+output_file = args.out
+# ---------------------------------------------------------------------------------------
+
+# ---- FULL MERGE: re-read everything and rewrite from scratch ----
+if args.full:
+    with stage("merge_full") as s:
+        s.rows = len(full_gdp_merge(main_file, gdp_file, output_file))
+    print("✓ Merge complete. Final file saved as:", output_file)
+
+# ---- INCREMENTAL MERGE: only re-merge rows whose inputs changed ----
+else:
+    with stage("merge_incremental") as s:
+        stats = incremental_gdp_merge(main_file, gdp_file, output_file)
+        s.rows = stats.remerged_rows
+    if stats.skipped:
+        print("✓ Inputs unchanged, nothing to merge:", output_file)
+    else:
+        print(
+            f"✓ Merge complete ({stats.remerged_rows}/{stats.base_rows} rows re-merged, "
+            f"{stats.changed_source_keys} GDP rows changed). Final file saved as:",
+            output_file,
+        )
@@ -0,0 +1,281 @@
+"""
+Timed, memory-tracked benchmarks for each pipeline stage on synthetic data.
+
+For every requested scale (a multiple of the real 59 countries) the inputs are
+generated with ``synthetic.write_synthetic_inputs``. Each stage is then timed
+``--repeat`` times, and run once more under ``tracemalloc`` for its peak Python
+allocation. The stages are:
+
+- ``read_csv``: load the combined table through ``dataset.load_table``
+- ``merge_full`` / ``merge_incremental`` / ``merge_noop``: 1.py's GDP merge,
+  as a plain merge, an incremental merge from an empty state, and an
+  incremental merge with nothing changed
+- ``aggregate``: h.py's population-weighted yearly aggregation
+- ``heatmap_pivots``: heatmap.py's ``build_indicator_pivots``
+- ``render``: h.py's three global figures (in-process, cache bypassed)
+- ``render_per_country``: per-country templates for the first
+  ``--render-countries`` countries
+
+Results go to a JSON file. ``--compare`` prints per-stage ratios against an
+earlier results file and exits non-zero when a stage is slower than
+``--threshold``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+VIS_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "Visualization"))
+if VIS_DIR not in sys.path:
+    sys.path.append(VIS_DIR)
+
+from aggregates import aggregate, numeric_columns  # noqa: E402
+from batch import render_per_country  # noqa: E402
+from dataset import ID_COLUMNS, load_table  # noqa: E402
+from h import (  # noqa: E402
+    DUAL_AXIS_STYLE,
+    TRAJECTORY_STYLE,
+    YOY_STYLE,
+    draw_dual_axis,
+    draw_trajectory,
+    draw_yoy_change,
+    yearly_frames,
+)
+from heatmap import CRIME_INDICATORS, build_indicator_pivots  # noqa: E402
+from merge import full_gdp_merge, incremental_gdp_merge  # noqa: E402
+from render import FigureJob, render_figures  # noqa: E402
+from synthetic import REAL_COUNTRIES, REAL_YEARS, write_synthetic_inputs  # noqa: E402
+
+RESULTS_VERSION = 1
+DEFAULT_RESULTS_DIR = os.path.join(CURRENT_DIR, ".cache", "benchmarks")
+
+
+def stage_read_csv(ctx: Dict[str, Any]) -> None:
+    load_table(ctx["paths"]["combined"])
+
+
+def stage_merge_full(ctx: Dict[str, Any]) -> None:
+    full_gdp_merge(ctx["paths"]["main"], ctx["paths"]["gdp"], os.path.join(ctx["work_dir"], "full.csv"))
+
+
+def stage_merge_incremental(ctx: Dict[str, Any]) -> None:
+    out = os.path.join(ctx["work_dir"], "incremental.csv")
+    state = f"{out}.state.pkl"
+    if os.path.exists(state):
+        os.remove(state)
+    incremental_gdp_merge(ctx["paths"]["main"], ctx["paths"]["gdp"], out, state)
+
+
+def stage_merge_noop(ctx: Dict[str, Any]) -> None:
+    out = os.path.join(ctx["work_dir"], "incremental.csv")
+    incremental_gdp_merge(ctx["paths"]["main"], ctx["paths"]["gdp"], out, f"{out}.state.pkl")
+
+
+def stage_aggregate(ctx: Dict[str, Any]) -> None:
+    yearly_frames(aggregate(ctx["main"], by=["year"], weight="total_pop"))
+
+
+def stage_heatmap_pivots(ctx: Dict[str, Any]) -> None:
+    build_indicator_pivots(ctx["combined"], CRIME_INDICATORS)
+
+
+def stage_render(ctx: Dict[str, Any]) -> None:
+    renewable_data, comparison_data = yearly_frames(
+        aggregate(ctx["main"], by=["year"], weight="total_pop")
+    )
+    out = ctx["work_dir"]
+    jobs = [
+        FigureJob("trajectory", draw_trajectory, renewable_data, os.path.join(out, "t.png"), TRAJECTORY_STYLE),
+        FigureJob("dual_axis", draw_dual_axis, comparison_data, os.path.join(out, "d.png"), DUAL_AXIS_STYLE),
+        FigureJob("yoy_change", draw_yoy_change, renewable_data, os.path.join(out, "y.png"), YOY_STYLE),
+    ]
+    render_figures(jobs, processes=1, force=True)
+
+
+def stage_render_per_country(ctx: Dict[str, Any]) -> None:
+    main = ctx["main"]
+    keep = main["country"].drop_duplicates().iloc[: ctx["render_countries"]]
+    render_per_country(
+        main[main["country"].isin(keep)],
+        out_dir=os.path.join(ctx["work_dir"], "per_country"),
+        styles={"trajectory": TRAJECTORY_STYLE, "dual_axis": DUAL_AXIS_STYLE, "yoy_change": YOY_STYLE},
+        processes=1,
+    )
+
+
+STAGES: Dict[str, Callable[[Dict[str, Any]], None]] = {
+    "read_csv": stage_read_csv,
+    "merge_full": stage_merge_full,
+    "merge_incremental": stage_merge_incremental,
+    "merge_noop": stage_merge_noop,
+    "aggregate": stage_aggregate,
+    "heatmap_pivots": stage_heatmap_pivots,
+    "render": stage_render,
+    "render_per_country": stage_render_per_country,
+}
+
+
+def measure(func: Callable[[Dict[str, Any]], None], ctx: Dict[str, Any], repeat: int) -> Dict[str, float]:
+    """Best/median wall time over ``repeat`` runs plus peak traced memory of one more run."""
+
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(ctx)
+        timings.append(time.perf_counter() - start)
+
+    # Traced separately: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    try:
+        func(ctx)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "peak_mb": peak / 1e6,
+    }
+
+
+def run_scale(
+    scale: float,
+    stages: Sequence[str],
+    years: int = REAL_YEARS,
+    extra_indicators: int = 0,
+    repeat: int = 3,
+    render_countries: int = 10,
+    seed: int = 0,
+    data_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Generate inputs for one scale and measure every stage on them."""
+
+    countries = max(1, int(round(REAL_COUNTRIES * scale)))
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        inputs_dir = data_dir or os.path.join(tmp, "inputs")
+        paths = write_synthetic_inputs(inputs_dir, countries, years, extra_indicators, seed)
+        combined = load_table(paths["combined"])
+        ctx: Dict[str, Any] = {
+            "paths": paths,
+            "work_dir": tmp,
+            "render_countries": render_countries,
+            "main": load_table(paths["main"]),
+            "combined": combined,
+        }
+
+        results: Dict[str, Dict[str, float]] = {}
+        for name in stages:
+            results[name] = measure(STAGES[name], ctx, repeat)
+            r = results[name]
+            print(f"  {name:<20} {r['seconds'] * 1000:10.1f} ms  {r['peak_mb']:9.1f} MB peak")
+
+        return {
+            "scale": scale,
+            "countries": countries,
+            "years": years,
+            "rows": int(len(combined)),
+            "indicators": len(numeric_columns(combined, exclude=ID_COLUMNS)),
+            "input_mb": {k: round(os.path.getsize(p) / 1e6, 3) for k, p in paths.items()},
+            "stages": results,
+        }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print time ratios against ``baseline``; return the stages slower than ``threshold``."""
+
+    previous = {(run["scale"], name): r for run in baseline["runs"] for name, r in run["stages"].items()}
+    regressions = []
+    print(f"\nCompared with {baseline.get('created', 'baseline')}:")
+    for run in current["runs"]:
+        for name, r in run["stages"].items():
+            old = previous.get((run["scale"], name))
+            if not old or not old["seconds"]:
+                continue
+            ratio = r["seconds"] / old["seconds"]
+            flag = "  <-- slower" if ratio > threshold else ""
+            print(f"  x{run['scale']:<6g} {name:<20} {ratio:6.2f}x{flag}")
+            if ratio > threshold:
+                regressions.append(f"x{run['scale']:g} {name}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the data pipeline on synthetic inputs.")
+    parser.add_argument("--scales", default="1,10", help="Comma-separated multiples of the real country count")
+    parser.add_argument("--years", type=int, default=REAL_YEARS)
+    parser.add_argument("--extra-indicators", type=int, default=0)
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of stages")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--render-countries", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="Keep the generated inputs here (one sub-folder per scale)")
+    parser.add_argument("--out", help="Results JSON (default: .cache/benchmarks/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    created = datetime.now(timezone.utc)
+    results: Dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "created": created.isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "years": args.years,
+            "extra_indicators": args.extra_indicators,
+            "repeat": args.repeat,
+            "render_countries": args.render_countries,
+            "seed": args.seed,
+        },
+        "runs": [],
+    }
+
+    for scale in (float(s) for s in args.scales.split(",")):
+        print(f"Scale x{scale:g} ({int(round(REAL_COUNTRIES * scale))} countries x {args.years} years):")
+        results["runs"].append(
+            run_scale(
+                scale, stages, args.years, args.extra_indicators,
+                args.repeat, args.render_countries, args.seed,
+                os.path.join(args.data_dir, f"x{scale:g}") if args.data_dir else None,
+            )
+        )
+
+    out = args.out or os.path.join(DEFAULT_RESULTS_DIR, f"{created:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"✓ Results written to {out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.threshold)
+        if regressions:
+            print(f"✗ {len(regressions)} stage(s) slower than {args.threshold:g}x: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Result caching for the stages that derive something from a source file.
+
+``cached`` memoizes a result in memory and pickles it under a cache folder,
+keyed on the source file (its SHA-256, or its size and modification time) plus
+the request parameters, so an unchanged file is never re-read for the same
+question. ``file_sha256`` is the content hash those keys and the output
+manifests use.
+"""
+
+import copy
+import hashlib
+import os
+import pickle
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_sha_memo: Dict[Tuple[str, int, int], str] = {}
+_memo: Dict[str, Any] = {}
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the hex SHA-256 of a file, read in fixed-size chunks.
+
+    The digest is remembered per (path, size, mtime), so several caches keyed
+    on the same file hash it only once per process.
+    """
+
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _sha_memo:
+        return _sha_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    _sha_memo[memo_key] = digest.hexdigest()
+    return _sha_memo[memo_key]
+
+
+def cache_key(path: str, params: Sequence, content: bool = True) -> str:
+    """Key for a result derived from ``path`` and the request ``params``.
+
+    With ``content`` the key covers the file's SHA-256; otherwise its path,
+    size and modification time, which avoids reading a large file at all.
+    """
+
+    if content:
+        source = file_sha256(path)
+    else:
+        stat = os.stat(path)
+        source = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(f"{source}:{tuple(params)!r}".encode()).hexdigest()[:32]
+
+
+def cached(
+    path: str,
+    params: Sequence,
+    build: Callable[[], T],
+    dump: Optional[Callable[[T], Any]] = None,
+    load: Optional[Callable[[Any], T]] = None,
+    cache_dir: Optional[str] = None,
+    content: bool = True,
+    copy_result: bool = True,
+) -> T:
+    """``build()``, memoized in memory and pickled as ``cache_dir/<key>.pkl``.
+
+    ``params`` identify the request and start with the caller's cache name and
+    version, e.g. ``("correlations", 1, columns, min_periods)``. ``dump`` turns
+    a result into plain fields before pickling and ``load`` rebuilds it, so a
+    cache written by ``python module.py`` (classes in ``__main__``) still loads
+    from any other entry point. ``cache_dir=None`` keeps the result in memory
+    only.
+
+    Every call returns its own deep copy of the memoized result, so a caller
+    that modifies it does not change what the next caller gets. Pass
+    ``copy_result=False`` only for results that cannot be modified (e.g.
+    read-only arrays).
+    """
+
+    key = cache_key(path, params, content)
+    if key not in _memo:
+        cache_path = os.path.join(cache_dir, f"{key}.pkl") if cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "rb") as fh:
+                state = pickle.load(fh)
+            result = load(state) if load else state
+        else:
+            result = build()
+            if cache_path:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(cache_path, "wb") as fh:
+                    pickle.dump(dump(result) if dump else result, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        _memo[key] = result
+
+    return copy.deepcopy(_memo[key]) if copy_result else _memo[key]
@@ -0,0 +1,202 @@
+"""
+Offline k-means clustering of country profiles ("Stable" vs "Volatile Urbanizers").
+
+This is the job lib/clustering.ts mirrors. Each country's profile is the mean
+of every numeric indicator over all years, standardized per indicator. k-means
+uses k-means++ seeding and ``n_init`` independent restarts run in parallel;
+distances are computed for all points and centroids at once with NumPy. The
+run with the lowest inertia wins and its labels are written back into the
+combined CSV as a ``Cluster_Label`` column, which ``normalizeRecord`` in
+lib/loadData.ts already reads. Run this once per data refresh instead of
+clustering on every page load.
+"""
+
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataset import ID_COLUMNS, canonical_name, load_table
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(CURRENT_DIR, "combined_urbanization_life_quality_2008_2020.csv")
+
+# Header written to the CSV; read back as ``cluster_label``
+LABEL_COLUMN = "Cluster_Label"
+STABLE_LABEL = "Stable Urbanizers"
+VOLATILE_LABEL = "Volatile Urbanizers"
+GPI_COL = "overall_score"
+GINI_COL = "gini_coefficient"
+
+
+def country_profiles(df: pd.DataFrame) -> pd.DataFrame:
+    """Mean of every numeric indicator per country (missing means become 0).
+
+    Filling with 0 matches what lib/clustering.ts has always done, so labels
+    stay comparable with the client-side fallback.
+    """
+
+    numeric = [
+        c for c in df.columns if c not in ID_COLUMNS and pd.api.types.is_numeric_dtype(df[c])
+    ]
+    return df.groupby("country", sort=True, observed=True)[numeric].mean().fillna(0.0)
+
+
+def standardize(X: np.ndarray) -> np.ndarray:
+    """StandardScaler equivalent; constant columns map to 0."""
+
+    mean = X.mean(axis=0)
+    std = X.std(axis=0)
+    safe = np.where(std > 0, std, 1.0)
+    return np.where(std > 0, (X - mean) / safe, 0.0)
+
+
+def squared_distances(X: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """All point-to-centroid squared distances as one matrix product."""
+
+    d = (
+        np.einsum("ij,ij->i", X, X)[:, None]
+        - 2.0 * X @ centroids.T
+        + np.einsum("ij,ij->i", centroids, centroids)[None, :]
+    )
+    return np.maximum(d, 0.0)
+
+
+def kmeans_plus_plus(X: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding: each new centre is drawn proportional to D(x)^2."""
+
+    centroids = [X[rng.integers(len(X))]]
+    closest = squared_distances(X, np.asarray(centroids))[:, 0]
+    for _ in range(1, k):
+        total = closest.sum()
+        idx = rng.choice(len(X), p=closest / total) if total > 0 else rng.integers(len(X))
+        centroids.append(X[idx])
+        closest = np.minimum(closest, squared_distances(X, X[idx][None, :])[:, 0])
+    return np.asarray(centroids)
+
+
+def kmeans_single(
+    X: np.ndarray, k: int, seed: int, max_iter: int = 300, tol: float = 1e-4
+) -> Tuple[float, np.ndarray]:
+    """One Lloyd run from a k-means++ start; returns (inertia, labels)."""
+
+    rng = np.random.default_rng(seed)
+    centroids = kmeans_plus_plus(X, k, rng)
+    labels = np.zeros(len(X), dtype=np.int64)
+    for _ in range(max_iter):
+        labels = squared_distances(X, centroids).argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, X)
+        # Empty clusters keep their previous centre
+        updated = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centroids)
+        shift = float(((updated - centroids) ** 2).sum())
+        centroids = updated
+        if shift <= tol:
+            break
+    distances = squared_distances(X, centroids)
+    labels = distances.argmin(axis=1)
+    return float(distances[np.arange(len(X)), labels].sum()), labels
+
+
+def _run(args: Tuple[np.ndarray, int, int, int]) -> Tuple[float, np.ndarray]:
+    return kmeans_single(*args)
+
+
+def kmeans(
+    X: np.ndarray,
+    k: int = 2,
+    n_init: int = 10,
+    random_state: int = 42,
+    max_iter: int = 300,
+    processes: Optional[int] = None,
+) -> np.ndarray:
+    """Best-of-``n_init`` k-means labels; restarts run in a process pool."""
+
+    tasks = [(X, k, random_state + i, max_iter) for i in range(n_init)]
+    workers = min(n_init, processes or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run, tasks))
+    else:
+        results = [_run(task) for task in tasks]
+    return min(results, key=lambda r: r[0])[1]
+
+
+def name_clusters(profiles: pd.DataFrame, labels: np.ndarray) -> Dict[str, str]:
+    """Map each country to Stable/Volatile, as lib/clustering.ts does.
+
+    Cluster 0 is "Stable" when it has both the lower mean GPI overall score
+    (more peaceful) and the lower mean Gini coefficient; otherwise cluster 1 is.
+    """
+
+    gpi = profiles[GPI_COL].groupby(labels).mean()
+    gini = profiles[GINI_COL].groupby(labels).mean()
+    zero_is_stable = gpi.get(0, np.inf) < gpi.get(1, np.inf) and gini.get(0, np.inf) < gini.get(1, np.inf)
+    stable = 0 if zero_is_stable else 1
+    return {
+        country: STABLE_LABEL if label == stable else VOLATILE_LABEL
+        for country, label in zip(profiles.index, labels)
+    }
+
+
+def write_labels(csv_path: str, labels: Dict[str, str], out_path: Optional[str] = None) -> int:
+    """Add or replace the ``Cluster_Label`` column without re-formatting other cells.
+
+    Rows are rewritten through the csv module so every other value keeps its
+    original text. Returns the number of labelled rows.
+    """
+
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as fh:
+        rows = list(csv.reader(fh))
+    header, body = rows[0], rows[1:]
+    canonical = [canonical_name(col) for col in header]
+    country_idx = canonical.index("country")
+    if "cluster_label" in canonical:
+        label_idx = canonical.index("cluster_label")
+    else:
+        header.append(LABEL_COLUMN)
+        label_idx = len(header) - 1
+
+    labelled = 0
+    for row in body:
+        row.extend([""] * (len(header) - len(row)))
+        row[label_idx] = labels.get(row[country_idx].strip(), "")
+        labelled += bool(row[label_idx])
+
+    with open(out_path or csv_path, "w", encoding="utf-8", newline="") as fh:
+        csv.writer(fh, lineterminator="\n").writerows([header, *body])
+    return labelled
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cluster countries and write Cluster_Label.")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--out", help="Write to another file instead of updating --csv in place")
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--n-init", type=int, default=10)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--processes", type=int)
+    args = parser.parse_args()
+
+    profiles = country_profiles(load_table(args.csv, compact=False))
+    X = standardize(profiles.to_numpy(dtype="float64"))
+    labels = kmeans(X, args.k, args.n_init, args.random_state, processes=args.processes)
+
+    if args.k == 2:
+        names = name_clusters(profiles, labels)
+    else:
+        names = {country: str(label) for country, label in zip(profiles.index, labels)}
+
+    counts: List[str] = [f"{name}={n}" for name, n in pd.Series(names).value_counts().items()]
+    rows = write_labels(args.csv, names, args.out)
+    print(f"✓ Clustered {len(profiles)} countries on {X.shape[1]} indicators ({', '.join(counts)})")
+    print(f"✓ {LABEL_COLUMN} written for {rows} rows -> {args.out or args.csv}")
+
+
+if __name__ == "__main__":
+    main()
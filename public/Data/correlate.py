@@ -0,0 +1,258 @@
+"""
+Full indicator correlation matrices per year, per cluster and over the panel.
+
+For every scope (``all``, ``year:<y>``, ``cluster:<label>``) this computes the
+k x k Pearson and Spearman matrices of every numeric indicator together with
+the pairwise-complete observation counts, i.e. each pair uses exactly the rows
+where both indicators are present, as ``DataFrame.corr`` does.
+
+Pearson comes out of a handful of matrix products over the presence mask:
+with ``M`` the 0/1 presence matrix and ``X`` the centred values (0 where
+missing), ``M.T @ M`` gives the pair counts and ``X.T @ M``, ``(X**2).T @ M``,
+``X.T @ X`` the per-pair sums, so no pair is visited in Python. Spearman needs
+ranks over each pair's common rows. Columns with the same missingness pattern
+share those rows with any other column, so the ranks are taken once per pair
+of distinct patterns and the block of coefficients is one matrix product of
+centred ranks. The panel's indicators share a handful of patterns, so this is
+a few products rather than pandas' loop over every pair, and it matches
+``DataFrame.corr(method="spearman")`` exactly.
+
+Results are cached under ``.cache/correlations`` on the CSV's content hash.
+"""
+
+import argparse
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aggregates import numeric_columns
+from cache import cached
+from dataset import DEFAULT_CSV, ID_COLUMNS, canonical_name, load_table
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(CURRENT_DIR, ".cache", "correlations")
+CACHE_VERSION = 1
+
+
+@dataclass
+class CorrelationMatrices:
+    """Pearson/Spearman matrices and pair counts for one scope."""
+
+    scope: str
+    columns: List[str]
+    pearson: np.ndarray
+    spearman: np.ndarray
+    counts: np.ndarray
+    rows: int
+
+    def frame(self, method: str = "pearson") -> pd.DataFrame:
+        values = {"pearson": self.pearson, "spearman": self.spearman, "counts": self.counts}[method]
+        return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+    def pair(self, a: str, b: str) -> Tuple[float, float, int]:
+        i, j = self.columns.index(a), self.columns.index(b)
+        return float(self.pearson[i, j]), float(self.spearman[i, j]), int(self.counts[i, j])
+
+    def long(self) -> pd.DataFrame:
+        """One row per unordered indicator pair."""
+
+        i, j = np.triu_indices(len(self.columns), k=1)
+        cols = np.asarray(self.columns)
+        return pd.DataFrame(
+            {
+                "scope": self.scope,
+                "a": cols[i],
+                "b": cols[j],
+                "pearson": self.pearson[i, j],
+                "spearman": self.spearman[i, j],
+                "n": self.counts[i, j],
+            }
+        )
+
+
+def _finish(cov: np.ndarray, var_a: np.ndarray, var_b: np.ndarray, counts: np.ndarray, min_periods: int) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = cov / np.sqrt(var_a * var_b)
+    r[(counts < max(min_periods, 2)) | (var_a <= 0) | (var_b <= 0)] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def pearson_matrix(X: np.ndarray, min_periods: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Pairwise-complete Pearson matrix and pair counts of the columns of ``X``."""
+
+    present = ~np.isnan(X)
+    M = present.astype("float64")
+    with np.errstate(invalid="ignore"):
+        centre = np.nanmean(np.where(present.any(axis=0), X, 0.0), axis=0)
+    # Centring first keeps the sum-of-squares formulas from cancelling
+    Xc = np.where(present, X - centre, 0.0)
+
+    counts = M.T @ M
+    sums = Xc.T @ M                  # sums[i, j]: sum of x_i where x_i and x_j are present
+    squares = (Xc * Xc).T @ M
+    products = Xc.T @ Xc
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = products - sums * sums.T / counts
+        var = squares - sums * sums / counts
+    return _finish(cov, var, var.T, counts, min_periods), counts.astype(np.int64)
+
+
+def average_ranks(A: np.ndarray) -> np.ndarray:
+    """Column-wise ranks of a matrix without NaNs, ties sharing their average rank."""
+
+    n = A.shape[0]
+    order = np.argsort(A, axis=0, kind="stable")
+    ordered = np.take_along_axis(A, order, axis=0)
+    idx = np.arange(n)[:, None]
+    starts = np.ones(A.shape, dtype=bool)
+    starts[1:] = ordered[1:] != ordered[:-1]
+    ends = np.ones(A.shape, dtype=bool)
+    ends[:-1] = starts[1:]
+    # Sorted position where each element's tie group starts and ends
+    first = np.maximum.accumulate(np.where(starts, idx, 0), axis=0)
+    last = np.minimum.accumulate(np.where(ends, idx, n - 1)[::-1], axis=0)[::-1]
+    ranks = np.empty(A.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2.0 + 1.0, axis=0)
+    return ranks
+
+
+def spearman_matrix(X: np.ndarray, min_periods: int = 1) -> np.ndarray:
+    """Pairwise-complete Spearman matrix (average ranks for ties, as pandas)."""
+
+    present = ~np.isnan(X)
+    k = X.shape[1]
+    rho = np.full((k, k), np.nan)
+    if k == 0:
+        return rho
+
+    # Columns sharing a missingness pattern share their common rows with any
+    # other column, so each pair of patterns is one ranking and one product
+    patterns, group = np.unique(present.T, axis=0, return_inverse=True)
+    group = group.ravel()
+    members = [np.flatnonzero(group == g) for g in range(len(patterns))]
+    for a in range(len(patterns)):
+        for b in range(a, len(patterns)):
+            rows = patterns[a] & patterns[b]
+            n = int(rows.sum())
+            if n < max(min_periods, 2):
+                continue
+            cols = np.r_[members[a], members[b]] if a != b else members[a]
+            ranks = average_ranks(X[np.ix_(rows, cols)])
+            ranks -= (n + 1) / 2.0
+            norms = np.sqrt((ranks * ranks).sum(axis=0))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                block = (ranks.T @ ranks) / np.outer(norms, norms)
+            block[(norms == 0)[:, None] | (norms == 0)[None, :]] = np.nan
+            block = np.clip(block, -1.0, 1.0)
+            if a == b:
+                rho[np.ix_(cols, cols)] = block
+            else:
+                # Only the cross block: within-pattern pairs use their own rows
+                split = len(members[a])
+                rho[np.ix_(members[a], members[b])] = block[:split, split:]
+                rho[np.ix_(members[b], members[a])] = block[split:, :split]
+    return rho
+
+
+def correlate(X: np.ndarray, columns: Sequence[str], scope: str, min_periods: int = 1) -> CorrelationMatrices:
+    pearson, counts = pearson_matrix(X, min_periods)
+    return CorrelationMatrices(
+        scope=scope,
+        columns=list(columns),
+        pearson=pearson,
+        spearman=spearman_matrix(X, min_periods),
+        counts=counts,
+        rows=len(X),
+    )
+
+
+def build_correlations(
+    panel: pd.DataFrame,
+    columns: Optional[Sequence[str]] = None,
+    min_periods: int = 1,
+) -> Dict[str, CorrelationMatrices]:
+    """Matrices for the whole panel, each year and each cluster label."""
+
+    columns = list(columns) if columns is not None else numeric_columns(panel, exclude=ID_COLUMNS)
+    X = panel[columns].to_numpy(dtype="float64")
+
+    scopes: Dict[str, np.ndarray] = {"all": np.ones(len(panel), dtype=bool)}
+    if "year" in panel.columns:
+        years = panel["year"].to_numpy()
+        for year in sorted(np.unique(years)):
+            scopes[f"year:{int(year)}"] = years == year
+    if "cluster_label" in panel.columns:
+        labels = panel["cluster_label"].astype(object).to_numpy()
+        for label in sorted(pd.unique(panel["cluster_label"].dropna())):
+            scopes[f"cluster:{label}"] = labels == label
+
+    return {scope: correlate(X[rows], columns, scope, min_periods) for scope, rows in scopes.items()}
+
+
+def load_correlations(
+    path: str = DEFAULT_CSV,
+    columns: Optional[Sequence[str]] = None,
+    min_periods: int = 1,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+) -> Dict[str, CorrelationMatrices]:
+    """Return :func:`build_correlations` for a CSV file, cached on its content hash."""
+
+    return cached(
+        path,
+        ("correlations", CACHE_VERSION, None if columns is None else list(columns), min_periods),
+        build=lambda: build_correlations(load_table(path, columns, compact=False), columns, min_periods),
+        dump=lambda results: {
+            scope: (m.scope, m.columns, m.pearson, m.spearman, m.counts, m.rows) for scope, m in results.items()
+        },
+        load=lambda state: {scope: CorrelationMatrices(*fields) for scope, fields in state.items()},
+        cache_dir=cache_dir,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Correlate every indicator pair per year, cluster and panel.")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--scope", default="all", help="all, year:<year> or cluster:<label>")
+    parser.add_argument("--method", choices=["pearson", "spearman"], default="pearson")
+    parser.add_argument("--min-periods", type=int, default=1)
+    parser.add_argument("--pair", help="Two comma-separated indicators to show across every scope")
+    parser.add_argument("--top", type=int, default=10, help="Strongest pairs to list for --scope")
+    parser.add_argument("--export", help="Write every pair of every scope to this CSV")
+    args = parser.parse_args()
+
+    results = load_correlations(args.csv, min_periods=args.min_periods)
+
+    if args.export:
+        table = pd.concat([m.long() for m in results.values()], ignore_index=True)
+        table.to_csv(args.export, index=False)
+        print(f"✓ {len(table)} pairs across {len(results)} scopes -> {args.export}")
+
+    if args.pair:
+        names = [canonical_name(s) for s in args.pair.split(",")]
+        columns = next(iter(results.values())).columns
+        if len(names) != 2:
+            parser.error("--pair takes exactly two comma-separated indicators")
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            parser.error(f"unknown indicator {', '.join(map(repr, unknown))}; available: {', '.join(columns)}")
+        a, b = names
+        print(f"{a} vs {b}:")
+        for scope, m in results.items():
+            pearson, spearman, n = m.pair(a, b)
+            print(f"  {scope:<28} pearson {pearson:7.3f}  spearman {spearman:7.3f}  n={n}")
+        return
+
+    if args.scope not in results:
+        parser.error(f"unknown scope {args.scope!r}; available: {', '.join(results)}")
+    pairs = results[args.scope].long()
+    pairs = pairs.reindex(pairs[args.method].abs().sort_values(ascending=False).index).head(args.top)
+    print(f"Strongest {args.method} pairs ({args.scope}, {len(results[args.scope].columns)} indicators):")
+    for row in pairs.itertuples():
+        print(f"  {row.a:<40} {row.b:<40} {getattr(row, args.method):7.3f}  n={row.n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Dense country x year x indicator cube of the panel, sliced without copying.
+
+The long CSV layout makes every question a groupby, pivot or boolean mask
+("indicator I of country C over the years", "every country in year Y"). A
+``PanelCube`` scatters the panel once into a C-contiguous float32 array of
+shape (countries, years, indicators), with NaN for missing cells, a boolean
+presence mask of the same shape and index maps for country codes (and names),
+years and indicators. Those questions then become basic NumPy indexing, which
+returns views:
+
+    cube.series("DEU", "gdp")    # values[c, :, i], one value per year
+    cube.country("DEU")          # values[c], years x indicators (contiguous)
+    cube.year(2015)              # values[:, y], countries x indicators
+    cube.indicator("gdp")        # values[:, :, i], countries x years
+
+``frame`` and ``table`` wrap the same views in DataFrames for pandas-based code.
+
+``load_cube`` builds the cube for a CSV once and saves it under
+``.cache/cubes/<key>/`` as ``.npy`` files keyed on the file's content hash;
+later loads memory-map them read-only. A memory-mapped cube pickles as its
+folder, so sending it to worker processes costs nothing and every worker maps
+the same pages of the OS page cache instead of receiving its own copy.
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from aggregates import numeric_columns
+from cache import cache_key, cached
+from dataset import DEFAULT_CSV, ID_COLUMNS, load_table
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(CURRENT_DIR, ".cache", "cubes")
+CACHE_VERSION = 1
+INDEX_NAME = "index.json"
+
+
+class PanelCube:
+    """Read-only (countries, years, indicators) float32 array with index maps."""
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        mask: np.ndarray,
+        codes: Sequence[str],
+        names: Sequence[str],
+        years: Sequence[int],
+        indicators: Sequence[str],
+        path: Optional[str] = None,
+    ):
+        expected = (len(codes), len(years), len(indicators))
+        if values.shape != expected or mask.shape != expected:
+            raise ValueError(f"cube shape {values.shape} does not match its index {expected}")
+        values.setflags(write=False)
+        mask.setflags(write=False)
+        self.values = values
+        self.mask = mask
+        self.codes = list(codes)
+        self.names = list(names)
+        self.years = np.asarray(years, dtype=np.int64)
+        self.indicators = list(indicators)
+        self.path = path
+
+        # Countries can be looked up by ISO code or by name
+        self.country_index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.country_index.update((code, i) for i, code in enumerate(self.codes))
+        self.year_index: Dict[int, int] = {int(y): i for i, y in enumerate(self.years)}
+        self.indicator_index: Dict[str, int] = {col: i for i, col in enumerate(self.indicators)}
+
+    def __repr__(self) -> str:
+        c, y, k = self.values.shape
+        source = f", mapped from {self.path}" if self.path else ""
+        return f"PanelCube({c} countries x {y} years x {k} indicators{source})"
+
+    def __reduce__(self):
+        # A file-backed cube is re-mapped by the receiving process, not copied
+        if self.path:
+            return (PanelCube.open, (self.path,))
+        return (PanelCube, (np.asarray(self.values), np.asarray(self.mask), self.codes, self.names,
+                            self.years, self.indicators))
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def _c(self, country: str) -> int:
+        try:
+            return self.country_index[country]
+        except KeyError:
+            raise KeyError(f"country {country!r} not in cube") from None
+
+    def _y(self, year: int) -> int:
+        try:
+            return self.year_index[int(year)]
+        except KeyError:
+            raise KeyError(f"year {year!r} not in cube") from None
+
+    def _i(self, indicator: str) -> int:
+        try:
+            return self.indicator_index[indicator]
+        except KeyError:
+            raise KeyError(f"indicator {indicator!r} not in cube") from None
+
+    def series(self, country: str, indicator: str) -> np.ndarray:
+        """One value per year of ``indicator`` for ``country`` (a view)."""
+
+        return self.values[self._c(country), :, self._i(indicator)]
+
+    def country(self, country: str) -> np.ndarray:
+        """years x indicators for one country (a contiguous view)."""
+
+        return self.values[self._c(country)]
+
+    def year(self, year: int) -> np.ndarray:
+        """countries x indicators for one year (a view)."""
+
+        return self.values[:, self._y(year)]
+
+    def indicator(self, indicator: str) -> np.ndarray:
+        """countries x years for one indicator (a view)."""
+
+        return self.values[:, :, self._i(indicator)]
+
+    def frame(self, country: Optional[str] = None, year: Optional[int] = None) -> pd.DataFrame:
+        """One country (rows = years, with a ``year`` column) or one year (rows =
+        country codes) as a DataFrame whose indicator columns are views."""
+
+        if (country is None) == (year is None):
+            raise ValueError("pass exactly one of country= or year=")
+        if country is not None:
+            block = self.country(country)
+            keys = {"year": self.years}
+        else:
+            block = self.year(year)
+            keys = {"country_code": np.asarray(self.codes, dtype=object)}
+        columns = {col: block[:, i] for i, col in enumerate(self.indicators)}
+        return pd.DataFrame({**keys, **columns}, copy=False)
+
+    def table(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Every (country, year) cell as a long DataFrame; indicator columns are
+        views, and cells that were not in the source are all NaN."""
+
+        n_countries, n_years, _ = self.values.shape
+        flat = self.values.reshape(n_countries * n_years, -1)
+        keys = {
+            "country": np.repeat(np.asarray(self.names, dtype=object), n_years),
+            "country_code": np.repeat(np.asarray(self.codes, dtype=object), n_years),
+            "year": np.tile(self.years, n_countries),
+        }
+        wanted = self.indicators if columns is None else list(columns)
+        data = {col: flat[:, self._i(col)] for col in wanted}
+        return pd.DataFrame({**keys, **data}, copy=False)
+
+    def save(self, directory: str) -> str:
+        """Write ``values.npy``, ``mask.npy`` and the index to ``directory``."""
+
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "values.npy"), np.ascontiguousarray(self.values))
+        np.save(os.path.join(directory, "mask.npy"), np.ascontiguousarray(self.mask))
+        index = {
+            "version": CACHE_VERSION,
+            "codes": self.codes,
+            "names": self.names,
+            "years": [int(y) for y in self.years],
+            "indicators": self.indicators,
+        }
+        with open(os.path.join(directory, INDEX_NAME), "w", encoding="utf-8") as fh:
+            json.dump(index, fh)
+        return directory
+
+    @classmethod
+    def open(cls, directory: str, mmap: bool = True) -> "PanelCube":
+        """Load a saved cube, memory-mapped read-only unless ``mmap=False``."""
+
+        with open(os.path.join(directory, INDEX_NAME), "r", encoding="utf-8") as fh:
+            index = json.load(fh)
+        mode = "r" if mmap else None
+        values = np.load(os.path.join(directory, "values.npy"), mmap_mode=mode)
+        mask = np.load(os.path.join(directory, "mask.npy"), mmap_mode=mode)
+        return cls(values, mask, index["codes"], index["names"], index["years"], index["indicators"],
+                   path=os.path.abspath(directory) if mmap else None)
+
+
+def build_cube(df: pd.DataFrame, indicators: Optional[Sequence[str]] = None) -> PanelCube:
+    """Scatter a long panel (canonical column names) into a :class:`PanelCube`.
+
+    Countries are ordered by code and years ascending. Each (country, year)
+    must appear at most once.
+    """
+
+    indicators = list(indicators) if indicators is not None else numeric_columns(df, exclude=ID_COLUMNS)
+    missing = [c for c in indicators if c not in df.columns]
+    if missing:
+        raise KeyError(f"{', '.join(missing)} not in the panel")
+
+    if "country_code" not in df.columns:
+        df = df.assign(country_code=df["country"])
+    df = df[df["year"].notna()]
+    if df.duplicated(["country_code", "year"]).any():
+        raise ValueError("the panel has more than one row for some (country_code, year)")
+
+    countries = df[["country_code", "country"]].astype(str).drop_duplicates("country_code")
+    countries = countries.sort_values("country_code", kind="stable")
+    codes = pd.Index(countries["country_code"])
+    years = np.sort(df["year"].astype(np.int64).unique())
+
+    ci = codes.get_indexer(df["country_code"].astype(str))
+    yi = np.searchsorted(years, df["year"].astype(np.int64).to_numpy())
+    values = np.full((len(codes), len(years), len(indicators)), np.nan, dtype=np.float32)
+    values[ci, yi] = df[indicators].to_numpy(dtype=np.float32)
+
+    return PanelCube(values, ~np.isnan(values), codes.tolist(), countries["country"].tolist(), years, indicators)
+
+
+def load_cube(
+    path: str = DEFAULT_CSV,
+    indicators: Optional[Sequence[str]] = None,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    mmap: bool = True,
+) -> PanelCube:
+    """:func:`build_cube` for a CSV file, saved on its content hash and memory-mapped."""
+
+    params = ("cubes", CACHE_VERSION, None if indicators is None else list(indicators))
+
+    def build() -> PanelCube:
+        if not cache_dir:
+            return build_cube(load_table(path, indicators, compact=False), indicators)
+        # Saved as .npy files rather than a pickle so later loads can memory-map them
+        directory = os.path.join(cache_dir, cache_key(path, params))
+        if not os.path.exists(os.path.join(directory, INDEX_NAME)):
+            build_cube(load_table(path, indicators, compact=False), indicators).save(directory)
+        return PanelCube.open(directory, mmap=mmap)
+
+    # The cube's arrays are read-only, so every caller can share one object
+    return cached(path, params, build, copy_result=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build (or open) the country x year x indicator cube of a CSV.")
+    parser.add_argument("csv", nargs="?", default=DEFAULT_CSV)
+    parser.add_argument("--columns", help="Comma-separated indicators (default: every numeric column)")
+    parser.add_argument("--compare", action="store_true", help="Time common slices against the long DataFrame")
+    args = parser.parse_args()
+
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+    cube = load_cube(args.csv, columns)
+    print(f"✓ {cube}, {cube.values.nbytes / 1e6:.2f} MB, {cube.mask.mean():.1%} of cells present")
+    if not args.compare:
+        return
+
+    df = load_table(args.csv, columns, compact=False)
+    country, indicator = cube.codes[len(cube.codes) // 2], cube.indicators[0]
+    year = int(cube.years[len(cube.years) // 2])
+
+    def timed(fn, repeat: int = 200) -> float:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat * 1e6
+
+    checks: Dict[str, tuple] = {
+        f"{indicator} of {country} over years": (
+            lambda: df.loc[df["country_code"] == country, ["year", indicator]].sort_values("year"),
+            lambda: cube.series(country, indicator),
+        ),
+        f"every country in {year}": (
+            lambda: df[df["year"] == year],
+            lambda: cube.year(year),
+        ),
+        f"{indicator} as country x year": (
+            lambda: df.pivot(index="country_code", columns="year", values=indicator),
+            lambda: cube.indicator(indicator),
+        ),
+    }
+    for label, (long_fn, cube_fn) in checks.items():
+        print(f"  {label:<48} DataFrame {timed(long_fn):9.1f} us   cube {timed(cube_fn):6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+One place to load the panel CSVs with canonical column names and compact dtypes.
+
+main.csv, gdp.csv and the combined file each spell the same indicator
+differently (``renewable_energy_consumption_percent`` / ``ren_energy_cons_perc``,
+``Year`` / ``year``, ``Gini coefficient (2021 prices)`` ...). Canonical names
+are the snake_case form of the ``DataRecord`` keys in lib/loadData.ts, so
+``renEnergyConsPerc`` is ``ren_energy_cons_perc`` here as well. Every stage
+that reads a panel through ``load_table`` names columns this way, whatever the
+file's own headers.
+
+Any header is matched by normalising it (lower case, runs of non-alphanumerics
+become ``_``) and then looking it up in ``ALIASES``. Headers that normalise
+straight to a canonical name (``homicide rate`` -> ``homicide_rate``) need no
+entry. ``load_table`` reads only the requested columns with explicit dtypes:
+float32 indicators, categorical country/code/cluster and int16 year. Nothing
+is parsed as float64/object and renamed or copied afterwards. When the columnar
+snapshot (snapshot.py) was built from the same bytes, compact loads read the
+projected columns from it instead of parsing the CSV.
+"""
+
+import argparse
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+import snapshot
+from cache import file_sha256
+from instrument import stage
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(CURRENT_DIR, "combined_urbanization_life_quality_2008_2020.csv")
+
+KEY_COLUMNS: List[str] = ["country", "country_code", "year"]
+# Identifier columns; everything else numeric is an indicator
+ID_COLUMNS: List[str] = ["country", "country_code", "year", "cluster_label"]
+CATEGORY_COLUMNS: List[str] = ["country", "country_code", "cluster_label"]
+YEAR_COLUMN = "year"
+INDICATOR_DTYPE = "float32"
+
+# Normalised source header -> canonical name, for headers that do not
+# normalise to the canonical name on their own
+ALIASES: Dict[str, str] = {
+    # main.csv
+    "total_population": "total_pop",
+    "population_density_sq_km": "pop_dens_sq_km",
+    "urban_population_percent": "urban_pop_perc",
+    "rural_population_percent": "rural_pop_perc",
+    "electricity_access_percent": "elect_access_pop",
+    "renewable_energy_consumption_percent": "ren_energy_cons_perc",
+    "clean_fuel_tech_cooking_percent": "clean_fuel_tech_cook_pop",
+    "co2_emissions_excl_lulucf": "co2_emiss_excl_lulucf",
+    # Global Peace Index / inequality columns of the combined file
+    "gini_coefficient_2021_prices": "gini_coefficient",
+    "gini_coef": "gini_coefficient",
+    "military_expenditure_gdp": "military_expenditure_perc_gdp",
+    "nuclear_and_heavy_weapons": "nuclear_heavy_weapons",
+    # World Bank columns of the combined file
+    "agriculture_forestry_and_fishing_value_added_of_gdp": "ag_value_added",
+    "agriculture_forestry_and_fishing_value_added_annual_growth": "ag_value_added_growth",
+    "adjusted_savings_natural_resources_depletion_of_gni": "adj_savings_natural_resources_depletion",
+    "adjusted_savings_net_forest_depletion_of_gni": "adj_savings_net_forest_depletion",
+    "adjusted_savings_energy_depletion_of_gni": "adj_savings_energy_depletion",
+    "adjusted_savings_carbon_dioxide_damage_of_gni": "carbon_damage",
+    "access_to_electricity_of_population": "access_to_electricity",
+    "access_to_clean_fuels_and_technologies_for_cooking_of_population": "clean_cooking_access",
+    "cluster": "cluster_label",
+}
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case ``name`` and collapse every run of non-alphanumerics to ``_``."""
+
+    return re.sub(r"[^0-9a-z]+", "_", str(name).strip().lower()).strip("_")
+
+
+def canonical_name(name: str) -> str:
+    """Canonical column name for any known spelling of a header."""
+
+    normalized = normalize_name(name)
+    return ALIASES.get(normalized, normalized)
+
+
+def register_alias(alias: str, canonical: str) -> None:
+    """Teach the loader another spelling, e.g. for a new source file."""
+
+    ALIASES[normalize_name(alias)] = canonical
+
+
+def header_map(path: str) -> Dict[str, str]:
+    """``{source header: canonical name}`` for a CSV file, in file order."""
+
+    header = pd.read_csv(path, nrows=0).columns
+    mapping: Dict[str, str] = {}
+    seen: Dict[str, str] = {}
+    for col in header:
+        canonical = canonical_name(col)
+        if canonical in seen:
+            raise ValueError(
+                f"{os.path.basename(path)}: columns {seen[canonical]!r} and {col!r} "
+                f"both map to {canonical!r}"
+            )
+        seen[canonical] = col
+        mapping[col] = canonical
+    return mapping
+
+
+def _read_snapshot(
+    path: str, usecols: Sequence[str], snapshot_dir: str = snapshot.DEFAULT_OUT_DIR
+) -> Optional[pd.DataFrame]:
+    """``usecols`` of ``path`` from its columnar snapshot, or None when there is
+    no snapshot of exactly these bytes."""
+
+    try:
+        manifest = snapshot.read_manifest(snapshot_dir)
+    except (OSError, ValueError):
+        return None
+    if (
+        manifest.get("version") != snapshot.SNAPSHOT_VERSION
+        or manifest.get("source") != os.path.basename(path)
+        or manifest.get("source_sha256") != file_sha256(path)
+    ):
+        return None
+    # A header the snapshot did not dictionary-encode would come back as NaN floats
+    if any(canonical_name(c) in CATEGORY_COLUMNS and c not in manifest["keys"] for c in usecols):
+        return None
+    return snapshot.load_columns(usecols, snapshot_dir, include_keys=False, mmap=False)
+
+
+def load_table(
+    path: str = DEFAULT_CSV,
+    columns: Optional[Sequence[str]] = None,
+    keys: bool = True,
+    compact: bool = True,
+    **read_csv_kwargs,
+) -> pd.DataFrame:
+    """Read a panel CSV with canonical column names.
+
+    ``columns`` are canonical names (or any alias) to project; the key columns
+    are added unless ``keys=False``. With ``compact=True`` indicators are read
+    as float32, country/code/cluster as categoricals and the year as int16.
+    ``compact=False`` keeps float64 for callers that need full precision.
+    Rows without a year are dropped. Compact loads without ``read_csv_kwargs``
+    come from the snapshot of ``path`` when it is current.
+    """
+
+    mapping = header_map(path)
+    by_canonical = {canonical: source for source, canonical in mapping.items()}
+
+    if columns is None:
+        wanted = list(by_canonical)
+    else:
+        wanted = [c for c in KEY_COLUMNS if keys and c in by_canonical]
+        for col in columns:
+            canonical = canonical_name(col)
+            if canonical not in by_canonical:
+                raise KeyError(f"{col!r} not found in {os.path.basename(path)}")
+            if canonical not in wanted:
+                wanted.append(canonical)
+
+    dtypes: Dict[str, str] = {}
+    for canonical in wanted:
+        source = by_canonical[canonical]
+        if canonical in CATEGORY_COLUMNS:
+            dtypes[source] = "category"
+        elif canonical != YEAR_COLUMN:
+            dtypes[source] = INDICATOR_DTYPE if compact else "float64"
+
+    usecols = [by_canonical[c] for c in wanted]
+    df = None
+    if compact and not read_csv_kwargs:
+        with stage("read_snapshot") as s:
+            df = _read_snapshot(path, usecols)
+            s.rows = 0 if df is None else len(df)
+    if df is None:
+        with stage("read_csv", bytes=os.path.getsize(path)) as s:
+            df = pd.read_csv(path, usecols=usecols, dtype=dtypes, **read_csv_kwargs)
+            s.rows = len(df)
+    df = df[usecols].rename(columns=mapping)
+
+    if YEAR_COLUMN in df.columns:
+        year = df[YEAR_COLUMN]
+        if year.isna().any():
+            df = df[year.notna()]
+        df[YEAR_COLUMN] = df[YEAR_COLUMN].astype("int16" if compact else "int64")
+    return df
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """Deep memory use of ``df`` in megabytes."""
+
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show canonical columns and memory use of a panel CSV.")
+    parser.add_argument("csv", nargs="?", default=DEFAULT_CSV)
+    parser.add_argument("--columns", help="Comma-separated columns to project")
+    args = parser.parse_args()
+
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+    for source, canonical in header_map(args.csv).items():
+        print(f"  {canonical:<45} <- {source}")
+
+    plain = memory_mb(pd.read_csv(args.csv))
+    compact = memory_mb(load_table(args.csv, columns))
+    print(f"✓ pd.read_csv: {plain:.2f} MB, load_table: {compact:.2f} MB ({compact / plain:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Per-country time-series derivations for every indicator in one vectorized pass.
+
+The panel is sorted by (country, year) and packed into one float64 matrix.
+Country boundaries become row offsets, and every derivation is computed for
+all countries and indicators at once from those offsets, with no per-group
+Python loop:
+
+- ``<col>_yoy``: change from the previous year (NaN across a gap in years)
+- ``<col>_pct``: the same change in percent of the previous value
+- ``<col>_roll<w>_mean`` / ``<col>_roll<w>_std``: trailing rolling mean and
+  sample standard deviation over ``w`` years
+- per country: ``cagr`` between the first and last observed value
+
+Like the incremental GDP merge, a pickled state next to the output keeps a
+content hash per country. Only countries whose source rows changed are derived
+again; the rest of the previous result is reused.
+"""
+
+import argparse
+import os
+import pickle
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aggregates import numeric_columns
+from dataset import DEFAULT_CSV, ID_COLUMNS, load_table
+from merge import row_hashes
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT_DIR = os.path.join(CURRENT_DIR, "derived")
+STATE_VERSION = 2
+
+KEYS: List[str] = ["country", "year"]
+
+
+@dataclass
+class DeriveStats:
+    """Summary of what an incremental derivation actually had to do."""
+
+    countries: int
+    recomputed_countries: int
+    rows: int
+    recomputed_rows: int
+
+
+def group_starts(codes: np.ndarray) -> np.ndarray:
+    """Row offset where each run of equal ``codes`` begins (codes must be sorted)."""
+
+    if len(codes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+
+def derive_panel(
+    panel: pd.DataFrame,
+    columns: Sequence[str],
+    window: int = 3,
+    min_periods: Optional[int] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Return ``(derived, cagr)`` for a panel sorted by (country, year).
+
+    ``derived`` has one row per input row with the key columns plus four
+    derived columns per indicator. ``cagr`` has one row per country and one
+    column per indicator. Rolling statistics need ``min_periods`` (default:
+    ``window``) non-missing values in the window, as in pandas.
+    """
+
+    columns = list(columns)
+    min_periods = window if min_periods is None else min_periods
+    codes, _ = pd.factorize(panel["country"], sort=False)
+    starts = group_starts(codes)
+    sizes = np.diff(np.r_[starts, len(codes)])
+    row_start = np.repeat(starts, sizes)
+
+    X = panel[columns].to_numpy(dtype="float64")
+    years = panel["year"].to_numpy(dtype="int64")
+    n, k = X.shape
+
+    # Year-over-year: previous row of the same country, exactly one year earlier
+    prev = np.full((n, k), np.nan)
+    has_prev = np.zeros(n, dtype=bool)
+    has_prev[1:] = (codes[1:] == codes[:-1]) & (years[1:] - years[:-1] == 1)
+    prev[1:][has_prev[1:]] = X[:-1][has_prev[1:]]
+    yoy = X - prev
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = np.where(prev != 0, yoy / prev * 100.0, np.nan)
+
+    # Rolling mean/std in two exact passes over the ``window`` row offsets
+    # (a loop over offsets, not groups); rows before a country's first row
+    # or ``window`` or more years back are masked out, so windows never
+    # cross countries and a gap in years shortens the window
+    present = ~np.isnan(X)
+    idx = np.arange(n)
+    lagged = []
+    for lag in range(window):
+        src = np.maximum(idx - lag, 0)
+        in_window = (idx - lag >= row_start) & (years - years[src] < window)
+        lagged.append((src, in_window[:, None] & present[src]))
+
+    count = sum(ok.astype("float64") for _, ok in lagged)
+    total = sum(np.where(ok, X[src], 0.0) for src, ok in lagged)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        squares = sum(np.where(ok, (X[src] - mean) ** 2, 0.0) for src, ok in lagged)
+        roll_mean = np.where(count >= min_periods, mean, np.nan)
+        roll_std = np.where(count >= max(min_periods, 2), np.sqrt(squares / (count - 1)), np.nan)
+
+    derived = {key: panel[key].to_numpy() for key in KEYS}
+    for j, col in enumerate(columns):
+        derived[f"{col}_yoy"] = yoy[:, j]
+        derived[f"{col}_pct"] = pct[:, j]
+        derived[f"{col}_roll{window}_mean"] = roll_mean[:, j]
+        derived[f"{col}_roll{window}_std"] = roll_std[:, j]
+    derived_df = pd.DataFrame(derived, index=panel.index)
+
+    # CAGR between each country's first and last observation of every indicator
+    row_idx = idx[:, None]
+    if n:
+        first = np.minimum.reduceat(np.where(present, row_idx, n), starts, axis=0)
+        last = np.maximum.reduceat(np.where(present, row_idx, -1), starts, axis=0)
+    else:
+        first = last = np.zeros((0, k), dtype=np.int64)
+    ok = (first < n) & (last >= 0) & (last > first)
+    first_c, last_c = np.where(ok, first, 0), np.where(ok, last, 0)
+    cols = np.arange(k)[None, :]
+    v0, v1 = X[first_c, cols], X[last_c, cols]
+    span = years[last_c] - years[first_c]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cagr = np.where(ok & (v0 > 0) & (v1 > 0) & (span > 0), (v1 / v0) ** (1.0 / span) - 1.0, np.nan)
+    countries = panel["country"].to_numpy()[starts] if n else []
+    cagr_df = pd.DataFrame(cagr, index=pd.Index(countries, name="country"), columns=columns)
+
+    return derived_df, cagr_df
+
+
+def country_hashes(panel: pd.DataFrame, columns: Sequence[str]) -> pd.Series:
+    """One content hash per country over its sorted rows (keys included)."""
+
+    hashes = row_hashes(panel[[*KEYS, *columns]]).to_numpy()
+    codes, _ = pd.factorize(panel["country"], sort=False)
+    starts = group_starts(codes)
+    # Mix in the position within the country so reordered values still differ
+    sizes = np.diff(np.r_[starts, len(hashes)])
+    position = (np.arange(len(hashes)) - np.repeat(starts, sizes)).astype(np.uint64)
+    mixed = hashes ^ (position * np.uint64(0x9E3779B97F4A7C15))
+    combined = np.add.reduceat(mixed, starts) if len(starts) else np.zeros(0, dtype=np.uint64)
+    return pd.Series(combined, index=panel["country"].to_numpy()[starts])
+
+
+def load_panel(csv_path: str, columns: Optional[Sequence[str]] = None) -> Tuple[pd.DataFrame, List[str]]:
+    """Full-precision panel sorted by (country, year) plus its indicator columns."""
+
+    panel = load_table(csv_path, columns, compact=False)
+    panel["country"] = panel["country"].astype(str)
+    panel = panel.sort_values(KEYS, kind="stable").reset_index(drop=True)
+    return panel, list(columns) if columns else numeric_columns(panel, exclude=ID_COLUMNS)
+
+
+def incremental_derive(
+    csv_path: str = DEFAULT_CSV,
+    out_dir: str = DEFAULT_OUT_DIR,
+    columns: Optional[Sequence[str]] = None,
+    window: int = 3,
+    full: bool = False,
+) -> DeriveStats:
+    """Write ``derived_panel.csv`` and ``derived_cagr.csv``, re-deriving changed countries only."""
+
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, "derived.state.pkl")
+    panel, columns = load_panel(csv_path, columns)
+    hashes = country_hashes(panel, columns)
+
+    state: Dict = {}
+    if not full and os.path.exists(state_path):
+        with open(state_path, "rb") as fh:
+            state = pickle.load(fh)
+        if state.get("version") != STATE_VERSION or state.get("params") != (columns, window):
+            state = {}
+
+    if state:
+        # Nullable UInt64 keeps new countries as <NA> instead of casting the hashes to float64
+        old = state["hashes"].astype("UInt64").reindex(hashes.index)
+        changed = hashes.index[(old != hashes).fillna(True).to_numpy(dtype=bool)]
+    else:
+        changed = hashes.index
+
+    subset = panel[panel["country"].isin(changed)]
+    derived_new, cagr_new = derive_panel(subset, columns, window)
+
+    if state:
+        # Reuse unchanged countries; countries no longer in the source are dropped
+        reuse = hashes.index.difference(changed)
+        old_derived, old_cagr = state["derived"], state["cagr"]
+        derived = pd.concat(
+            [old_derived[old_derived["country"].isin(reuse)], derived_new], ignore_index=True
+        )
+        cagr = pd.concat([old_cagr[old_cagr.index.isin(reuse)], cagr_new])
+        derived = derived.sort_values(KEYS, kind="stable").reset_index(drop=True)
+        cagr = cagr.sort_index()
+    else:
+        derived, cagr = derived_new.reset_index(drop=True), cagr_new
+
+    derived.to_csv(os.path.join(out_dir, "derived_panel.csv"), index=False)
+    cagr.to_csv(os.path.join(out_dir, "derived_cagr.csv"))
+
+    with open(state_path, "wb") as fh:
+        pickle.dump(
+            {
+                "version": STATE_VERSION,
+                "params": (columns, window),
+                "hashes": hashes,
+                "derived": derived,
+                "cagr": cagr,
+            },
+            fh,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
+    return DeriveStats(
+        countries=len(hashes),
+        recomputed_countries=len(changed),
+        rows=len(derived),
+        recomputed_rows=len(subset),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Derive YoY, rolling and CAGR series per country.")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--columns", help="Comma-separated canonical columns (default: every indicator)")
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--full", action="store_true", help="Ignore the saved state and derive everything")
+    args = parser.parse_args()
+
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+    stats = incremental_derive(args.csv, args.out_dir, columns, args.window, args.full)
+    print(
+        f"✓ Derived {stats.rows} rows for {stats.countries} countries "
+        f"(recomputed {stats.recomputed_countries} countries / {stats.recomputed_rows} rows) -> {args.out_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Bulk gap-filling for the country x year panels, with a mask of what was filled.
+
+Blank cells in gdp.csv and the combined file end up as ``null`` in
+lib/loadData.ts and are then read as 0 by ``|| 0`` in the charts and in
+``clusterCountries``. This stage fills them in three steps, each a single
+array operation over the whole panel (all countries and indicators at once):
+
+1. ``linear``: interior gaps are interpolated over years between the previous
+   and next observation of the same country (``method="nearest"`` takes the
+   closer of the two instead)
+2. ``edge``: leading/trailing gaps copy the nearest observation of the same
+   country
+3. ``fallback``: whatever is still missing takes the mean of the same year
+   within a group column (e.g. a region or the cluster label)
+
+Previous/next observations come from running max/min accumulations of row
+indices. The panel is sorted by (country, year), so an index that falls
+outside the current country's rows means there is no neighbour on that side.
+``max_gap`` limits how many missing years may be bridged.
+
+The mask holds one code per cell: 0 observed, 1 linear/nearest, 2 edge,
+3 fallback, 255 still missing.
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataset import DEFAULT_CSV, canonical_name
+from derive import DEFAULT_OUT_DIR, group_starts, load_panel
+
+OBSERVED, INTERPOLATED, EDGE, FALLBACK, MISSING = 0, 1, 2, 3, 255
+
+
+def impute_panel(
+    panel: pd.DataFrame,
+    columns: Sequence[str],
+    method: str = "linear",
+    edges: bool = True,
+    max_gap: Optional[int] = None,
+    fallback_by: Optional[str] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Return ``(filled, mask)`` for a panel sorted by (country, year).
+
+    ``filled`` is a copy of ``panel`` with ``columns`` gap-filled; ``mask``
+    has the key columns plus a uint8 code per filled column.
+    """
+
+    if method not in ("linear", "nearest"):
+        raise ValueError(f"method must be 'linear' or 'nearest', got {method!r}")
+
+    columns = list(columns)
+    X = panel[columns].to_numpy(dtype="float64")
+    n, k = X.shape
+    years = panel["year"].to_numpy(dtype="float64")
+    codes, _ = pd.factorize(panel["country"], sort=False)
+    starts = group_starts(codes)
+    sizes = np.diff(np.r_[starts, n])
+    row_start = np.repeat(starts, sizes)[:, None]
+    row_end = np.repeat(np.r_[starts[1:], n] - 1, sizes)[:, None]
+
+    present = ~np.isnan(X)
+    mask = np.where(present, OBSERVED, MISSING).astype(np.uint8)
+    idx = np.arange(n)[:, None]
+
+    # Index of the previous / next observed row for every cell, whole panel at once
+    prev = np.maximum.accumulate(np.where(present, idx, -1), axis=0)
+    nxt = np.minimum.accumulate(np.where(present, idx, n)[::-1], axis=0)[::-1]
+    has_prev = prev >= row_start
+    has_next = nxt <= row_end
+    prev_c, next_c = np.clip(prev, 0, n - 1), np.clip(nxt, 0, n - 1)
+    cols = np.arange(k)[None, :]
+    v_prev, v_next = X[prev_c, cols], X[next_c, cols]
+    y = years[:, None]
+    y_prev, y_next = years[prev_c], years[next_c]
+
+    limit = np.inf if max_gap is None else max_gap
+    missing = ~present
+
+    interior = missing & has_prev & has_next & ((y_next - y_prev - 1) <= limit)
+    if method == "linear":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = (y - y_prev) / (y_next - y_prev)
+        values = v_prev + (v_next - v_prev) * frac
+    else:
+        values = np.where((y - y_prev) <= (y_next - y), v_prev, v_next)
+    X = np.where(interior, values, X)
+    mask[interior] = INTERPOLATED
+
+    if edges:
+        lead = missing & ~has_prev & has_next & ((y_next - y) <= limit)
+        trail = missing & has_prev & ~has_next & ((y - y_prev) <= limit)
+        X = np.where(lead, v_next, np.where(trail, v_prev, X))
+        mask[lead | trail] = EDGE
+
+    filled = panel.copy()
+    filled[columns] = X
+
+    if fallback_by is not None:
+        means = filled.groupby([fallback_by, "year"], observed=True)[columns].transform("mean")
+        still = np.isnan(X)
+        fallback_values = means.to_numpy(dtype="float64")
+        use = still & ~np.isnan(fallback_values)
+        filled[columns] = np.where(use, fallback_values, X)
+        mask[use] = FALLBACK
+
+    mask_df = pd.DataFrame(mask, columns=columns, index=panel.index)
+    mask_df.insert(0, "year", panel["year"].to_numpy())
+    mask_df.insert(0, "country", panel["country"].to_numpy())
+    return filled, mask_df
+
+
+def read_regions(path: str) -> Dict[str, str]:
+    """``{country_code: region}`` from a CSV with ``country_code`` and ``region`` columns.
+
+    This reads regions.csv as well as a plain two-column file (code, region).
+    Codes without a region (the aggregate rows) are left out.
+    """
+
+    regions = pd.read_csv(path, dtype=str)
+    regions.columns = [canonical_name(col) for col in regions.columns]
+    if {"country_code", "region"} <= set(regions.columns):
+        codes, names = regions["country_code"], regions["region"]
+    else:
+        codes, names = regions.iloc[:, 0], regions.iloc[:, 1]
+    pairs = pd.DataFrame({"code": codes.str.strip(), "region": names.str.strip()}).dropna()
+    pairs = pairs[pairs["region"] != ""]
+    return dict(zip(pairs["code"], pairs["region"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gap-fill a panel CSV and write an imputation mask.")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--columns", help="Comma-separated columns (default: every indicator)")
+    parser.add_argument("--method", choices=["linear", "nearest"], default="linear")
+    parser.add_argument("--no-edges", action="store_true", help="Leave leading/trailing gaps empty")
+    parser.add_argument("--max-gap", type=int, help="Most consecutive missing years to fill")
+    parser.add_argument("--fallback-by", help="Column whose same-year mean fills what is left")
+    parser.add_argument("--regions", help="CSV with country_code and region columns (e.g. regions.csv); enables a regional fallback")
+    args = parser.parse_args()
+
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+    start = time.perf_counter()
+    panel, columns = load_panel(args.csv, columns)
+
+    fallback_by = canonical_name(args.fallback_by) if args.fallback_by else None
+    if args.regions:
+        panel["region"] = panel["country_code"].astype(str).map(read_regions(args.regions))
+        fallback_by = "region"
+
+    filled, mask = impute_panel(
+        panel, columns, args.method, not args.no_edges, args.max_gap, fallback_by
+    )
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(args.csv))[0]
+    filled.to_csv(os.path.join(args.out_dir, f"{stem}_imputed.csv"), index=False)
+    mask.to_csv(os.path.join(args.out_dir, f"{stem}_imputed_mask.csv"), index=False)
+
+    codes = mask[columns].to_numpy()
+    labels = {"linear": INTERPOLATED, "edge": EDGE, "fallback": FALLBACK, "missing": MISSING}
+    counts = ", ".join(f"{name}={int((codes == code).sum())}" for name, code in labels.items())
+    print(f"✓ Imputed {len(filled)} rows x {len(columns)} columns in {elapsed * 1000:.0f} ms: {counts}")
+    print(f"✓ Written to {args.out_dir}/{stem}_imputed.csv (+ _imputed_mask.csv)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Lightweight stage instrumentation for the data and visualization scripts.
+
+Wrap any step in ``with stage("name") as s:`` and optionally set ``s.rows``
+and ``s.bytes``. Nothing is measured unless profiling is switched on:
+
+- ``PIPELINE_PROFILE=1`` writes a JSON run report to
+  ``public/Data/.cache/profiles/<script>-<timestamp>.json`` when the process
+  exits; ``PIPELINE_PROFILE=path/to/report.json`` writes it there instead
+- ``PIPELINE_PROFILE_CPROFILE=dir`` also dumps one cProfile ``.prof`` file
+  per outermost stage into ``dir`` (open with ``snakeviz`` or ``pstats``)
+
+or call ``enable()`` from code. Each stage records wall time, CPU time, the
+process peak RSS after the stage and how much the stage raised it, plus any
+row/byte counts. Stages nest: the report keeps the ``outer/inner`` path.
+When disabled, ``stage()`` hands back one shared no-op object, so the cost
+is a function call and an attribute check.
+
+Work done inside process-pool workers (e.g. parallel ``savefig``) is not
+captured; run the script's serial mode to see it.
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REPORT_DIR = os.path.join(CURRENT_DIR, ".cache", "profiles")
+REPORT_VERSION = 1
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB."""
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+class _NullStage:
+    """Shared stand-in used while profiling is off."""
+
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    """One measured stage; created by :func:`stage` while profiling is on."""
+
+    def __init__(self, recorder: "Recorder", name: str, rows: Optional[int], nbytes: Optional[int]):
+        self.recorder = recorder
+        self.name = name
+        self.rows = rows
+        self.bytes = nbytes
+        self._profile: Optional[cProfile.Profile] = None
+
+    def __enter__(self) -> "Stage":
+        rec = self.recorder
+        rec.stack.append(self.name)
+        self.path = "/".join(rec.stack)
+        if rec.cprofile_dir and len(rec.stack) == 1:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._rss0 = peak_rss_mb()
+        self._cpu0 = time.process_time()
+        self._wall0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        wall = time.perf_counter() - self._wall0
+        cpu = time.process_time() - self._cpu0
+        rss = peak_rss_mb()
+        rec = self.recorder
+
+        profile_path = None
+        if self._profile is not None:
+            self._profile.disable()
+            os.makedirs(rec.cprofile_dir, exist_ok=True)
+            safe = re.sub(r"[^0-9A-Za-z._-]+", "_", self.name)
+            fname = f"{rec.run_id}-{len(rec.stages):03d}-{safe}.prof"
+            profile_path = os.path.join(rec.cprofile_dir, fname)
+            self._profile.dump_stats(profile_path)
+
+        rec.stack.pop()
+        rec.stages.append(
+            {
+                "name": self.name,
+                "path": self.path,
+                "wall_seconds": round(wall, 6),
+                "cpu_seconds": round(cpu, 6),
+                "peak_rss_mb": None if rss is None else round(rss, 2),
+                "rss_growth_mb": None if rss is None else round(rss - self._rss0, 2),
+                "rows": self.rows,
+                "bytes": self.bytes,
+                "profile": profile_path,
+                "error": None if exc_type is None else exc_type.__name__,
+            }
+        )
+
+
+class Recorder:
+    """Collects stages for one process and writes the run report."""
+
+    def __init__(self, report_path: Optional[str] = None, cprofile_dir: Optional[str] = None):
+        self.started = datetime.now(timezone.utc)
+        script = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+        self.run_id = f"{script}-{self.started:%Y%m%dT%H%M%SZ}"
+        self.report_path = report_path or os.path.join(DEFAULT_REPORT_DIR, f"{self.run_id}.json")
+        self.cprofile_dir = cprofile_dir
+        self._local = threading.local()
+        self.stages: List[Dict[str, Any]] = []
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+    @property
+    def stack(self) -> List[str]:
+        """Open stage names of the calling thread (stages nest per thread)."""
+
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "version": REPORT_VERSION,
+            "script": sys.argv[0],
+            "argv": sys.argv[1:],
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_seconds": round(time.perf_counter() - self._wall0, 6),
+            "cpu_seconds": round(time.process_time() - self._cpu0, 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+        }
+
+    def write(self) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(self.report_path)), exist_ok=True)
+        with open(self.report_path, "w", encoding="utf-8") as fh:
+            json.dump(self.report(), fh, indent=2)
+        return self.report_path
+
+    def summary(self) -> str:
+        lines = [f"Stage profile ({len(self.stages)} stages) -> {self.report_path}"]
+        for s in self.stages:
+            rows = f" {s['rows']} rows" if s["rows"] is not None else ""
+            lines.append(f"  {s['path']:<40} {s['wall_seconds'] * 1000:9.1f} ms wall "
+                         f"{s['cpu_seconds'] * 1000:9.1f} ms cpu{rows}")
+        return "\n".join(lines)
+
+
+_recorder: Optional[Recorder] = None
+
+
+def enable(report_path: Optional[str] = None, cprofile_dir: Optional[str] = None) -> Recorder:
+    """Start recording stages; the report is written when the process exits."""
+
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder(report_path, cprofile_dir)
+        atexit.register(_write_at_exit)
+    return _recorder
+
+
+def enabled() -> bool:
+    return _recorder is not None
+
+
+def stage(name: str, rows: Optional[int] = None, bytes: Optional[int] = None):
+    """Context manager measuring one named stage (a no-op unless enabled)."""
+
+    if _recorder is None:
+        return _NULL_STAGE
+    return Stage(_recorder, name, rows, bytes)
+
+
+def _write_at_exit() -> None:
+    if _recorder is not None and _recorder.stages:
+        _recorder.write()
+        print(_recorder.summary(), file=sys.stderr)
+
+
+_env = os.environ.get("PIPELINE_PROFILE", "")
+if _env and _env.lower() not in ("0", "false", "no"):
+    enable(
+        report_path=None if _env.lower() in ("1", "true", "yes") else _env,
+        cprofile_dir=os.environ.get("PIPELINE_PROFILE_CPROFILE") or None,
+    )
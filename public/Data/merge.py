@@ -0,0 +1,347 @@
+"""
+Merge helpers for attaching World Bank indicators to the base country panel.
+
+``multi_join`` attaches any number of indicator sources to a base table in a
+single pass: every source is read once with only its key and value columns,
+the sources are aligned on a shared key index and joined onto the base in one
+step, and one output file is written. Run this module directly for the CLI.
+
+The incremental GDP merge keeps a persistent (country_code, year) index over
+the GDP source together with per-row content hashes. On each run only the
+rows whose GDP values or base values changed since the previous run are
+looked up again; everything else is reused from the stored merge result.
+"""
+
+import argparse
+import json
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+KEY_COLUMNS: List[str] = ["Country_Code", "Year"]
+STATE_VERSION = 1
+
+
+@dataclass
+class MergeStats:
+    """Summary of what an incremental merge actually had to do."""
+
+    base_rows: int
+    source_rows: int
+    changed_source_keys: int
+    remerged_rows: int
+    skipped: bool = False
+
+
+@dataclass
+class SourceSpec:
+    """One indicator source for :func:`multi_join`.
+
+    ``keys`` maps source key columns to base key columns and ``columns`` maps
+    source value columns to their output names.
+    """
+
+    path: str
+    keys: Dict[str, str]
+    columns: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def parse(cls, text: str) -> "SourceSpec":
+        """Parse ``PATH|src_key=base_key,...|src_col[=out_col],...``.
+
+        ``|`` is used as the separator so Windows drive letters keep working.
+        """
+
+        parts = text.split("|")
+        if len(parts) != 3:
+            raise ValueError(f"Expected PATH|KEYS|COLUMNS, got: {text!r}")
+        path, keys_text, cols_text = parts
+        keys = dict(_pair(item) for item in keys_text.split(",") if item)
+        columns = dict(_pair(item) for item in cols_text.split(",") if item)
+        return cls(path=path, keys=keys, columns=columns)
+
+
+def _pair(item: str) -> Tuple[str, str]:
+    src, _, dst = item.partition("=")
+    return src.strip(), (dst or src).strip()
+
+
+def normalize_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Strip/uppercase country codes and make years integers, in place."""
+
+    df["Country_Code"] = df["Country_Code"].astype(str).str.strip().str.upper()
+    df["Year"] = df["Year"].astype(int)
+    return df
+
+
+def file_fingerprint(path: str) -> Tuple[int, int]:
+    """Cheap change detector: (size, mtime in ns)."""
+
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def row_hashes(df: pd.DataFrame) -> pd.Series:
+    """Return a 64-bit content hash per row, indexed like ``df``."""
+
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+def read_gdp_index(
+    gdp_path: str,
+    value_columns: Sequence[str] = ("gdp",),
+    chunksize: int = 2000,
+) -> pd.DataFrame:
+    """Read the GDP source in chunks, projecting only the key/value columns.
+
+    Returns a frame indexed by (Country_Code, Year) holding the value columns
+    plus a ``_row_hash`` column used to detect changes between runs.
+    """
+
+    usecols = ["country_code", "year", *value_columns]
+    parts = []
+    for chunk in pd.read_csv(gdp_path, usecols=usecols, chunksize=chunksize):
+        chunk = chunk.rename(columns={"country_code": "Country_Code", "year": "Year"})
+        normalize_keys(chunk)
+        chunk["_row_hash"] = row_hashes(chunk[list(value_columns)]).to_numpy()
+        parts.append(chunk)
+
+    gdp = pd.concat(parts, ignore_index=True)
+    gdp = gdp.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+    return gdp.set_index(KEY_COLUMNS).sort_index()
+
+
+def changed_keys(old: Optional[pd.Series], new: pd.Series) -> pd.Index:
+    """Return index keys that were added, removed or whose hash differs."""
+
+    if old is None:
+        return new.index
+    aligned_old, aligned_new = old.align(new, join="outer")
+    return aligned_new.index[aligned_old.ne(aligned_new).to_numpy()]
+
+
+def _join_keys(df: pd.DataFrame, columns: Sequence[str]) -> pd.MultiIndex:
+    """Build a normalized join index without touching the original columns.
+
+    Numeric keys are cast to integers, text keys are stripped and uppercased,
+    matching the normalization the GDP merge has always applied.
+    """
+
+    arrays = []
+    for col in columns:
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values):
+            arrays.append(values.astype("Int64"))
+        else:
+            arrays.append(values.astype(str).str.strip().str.upper())
+    return pd.MultiIndex.from_arrays(arrays)
+
+
+def multi_join(
+    base_path: str,
+    sources: Sequence[SourceSpec],
+    output_path: Optional[str] = None,
+) -> pd.DataFrame:
+    """Left-join every source onto the base table in a single pass.
+
+    Each source file is read exactly once with only its key and value columns,
+    de-duplicated on its keys and re-indexed on the base key columns. All
+    sources are then aligned into one wide frame and joined onto the base with
+    one lookup, so there are no intermediate CSVs between sources.
+    """
+
+    base = pd.read_csv(base_path)
+    base_keys = list(sources[0].keys.values()) if sources else []
+    taken = set(base.columns)
+    aligned: List[pd.DataFrame] = []
+
+    for spec in sources:
+        if sorted(spec.keys.values()) != sorted(base_keys):
+            raise ValueError(f"{spec.path} must map onto the base keys {base_keys}")
+        clash = taken.intersection(spec.columns.values())
+        if clash:
+            raise ValueError(f"Output columns from {spec.path} already exist: {sorted(clash)}")
+        taken.update(spec.columns.values())
+
+        # Order the source keys like the base keys so the indexes line up
+        by_base = {dst: src for src, dst in spec.keys.items()}
+        src_keys = [by_base[key] for key in base_keys]
+        src = pd.read_csv(spec.path, usecols=[*src_keys, *spec.columns])
+        src.index = _join_keys(src, src_keys)
+        src = src[list(spec.columns)].rename(columns=spec.columns)
+        aligned.append(src[~src.index.duplicated(keep="last")])
+
+    result = base
+    if aligned:
+        wide = pd.concat(aligned, axis=1, join="outer")
+        looked_up = wide.reindex(_join_keys(base, base_keys))
+        result = pd.concat([base, looked_up.set_axis(base.index, axis=0)], axis=1)
+
+    if output_path:
+        result.to_csv(output_path, index=False)
+    return result
+
+
+def full_gdp_merge(
+    main_path: str,
+    gdp_path: str,
+    output_path: str,
+    value_columns: Sequence[str] = ("gdp",),
+) -> pd.DataFrame:
+    """Plain left merge of the GDP columns onto the base table."""
+
+    main_df = normalize_keys(pd.read_csv(main_path))
+    gdp = read_gdp_index(gdp_path, value_columns).drop(columns="_row_hash")
+    final_df = main_df.merge(gdp.reset_index(), on=KEY_COLUMNS, how="left")
+    final_df.to_csv(output_path, index=False)
+    return final_df
+
+
+def incremental_gdp_merge(
+    main_path: str,
+    gdp_path: str,
+    output_path: str,
+    state_path: Optional[str] = None,
+    value_columns: Sequence[str] = ("gdp",),
+) -> MergeStats:
+    """Left-merge GDP onto the base table, re-merging only changed rows.
+
+    State (source fingerprints, the GDP index with row hashes, base row hashes
+    and the previously merged GDP values) is pickled next to the output. A run
+    where neither input changed returns immediately without reading either
+    file; otherwise only base rows whose key maps to a changed GDP row, or
+    whose own content changed, are looked up in the index again.
+    """
+
+    state_path = state_path or f"{output_path}.state.pkl"
+    value_columns = list(value_columns)
+    state: Dict = {}
+    if os.path.exists(state_path):
+        with open(state_path, "rb") as fh:
+            state = pickle.load(fh)
+        if state.get("version") != STATE_VERSION or state.get("value_columns") != value_columns:
+            state = {}
+
+    main_fp = file_fingerprint(main_path)
+    gdp_fp = file_fingerprint(gdp_path)
+    if (
+        state
+        and state["main_fp"] == main_fp
+        and state["gdp_fp"] == gdp_fp
+        and os.path.exists(output_path)
+    ):
+        return MergeStats(
+            base_rows=len(state["merged"]),
+            source_rows=len(state["gdp"]),
+            changed_source_keys=0,
+            remerged_rows=0,
+            skipped=True,
+        )
+
+    # GDP side: reuse the stored index when the file itself is unchanged
+    if state and state["gdp_fp"] == gdp_fp:
+        gdp = state["gdp"]
+        gdp_changed = pd.Index([])
+    else:
+        gdp = read_gdp_index(gdp_path, value_columns)
+        gdp_changed = changed_keys(state["gdp"]["_row_hash"] if state else None, gdp["_row_hash"])
+
+    # Base side: hash each row so edits to the base table are detected too
+    main_df = normalize_keys(pd.read_csv(main_path))
+    main_keys = pd.MultiIndex.from_frame(main_df[KEY_COLUMNS])
+    main_hash = pd.Series(row_hashes(main_df).to_numpy(), index=main_keys)
+
+    previous: Optional[pd.DataFrame] = state.get("merged") if state else None
+    if previous is None:
+        dirty = pd.Series(True, index=main_keys)
+    else:
+        dirty = pd.Series(
+            main_hash.ne(state["main_hash"].reindex(main_keys)).to_numpy(), index=main_keys
+        )
+        dirty |= main_keys.isin(gdp_changed)
+        # Base rows missing from the previous result always need a lookup
+        dirty |= ~main_keys.isin(previous.index)
+
+    merged = pd.DataFrame(index=main_keys, columns=value_columns, dtype="float64")
+    if previous is not None:
+        clean = ~dirty.to_numpy()
+        merged.loc[clean, value_columns] = previous.reindex(main_keys[clean]).to_numpy()
+    dirty_keys = main_keys[dirty.to_numpy()]
+    merged.loc[dirty.to_numpy(), value_columns] = gdp.reindex(dirty_keys)[value_columns].to_numpy()
+
+    final_df = main_df.copy()
+    for col in value_columns:
+        final_df[col] = merged[col].to_numpy()
+    final_df.to_csv(output_path, index=False)
+
+    with open(state_path, "wb") as fh:
+        pickle.dump(
+            {
+                "version": STATE_VERSION,
+                "value_columns": value_columns,
+                "main_fp": main_fp,
+                "gdp_fp": gdp_fp,
+                "gdp": gdp,
+                "main_hash": main_hash,
+                "merged": merged,
+            },
+            fh,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
+    return MergeStats(
+        base_rows=len(main_df),
+        source_rows=len(gdp),
+        changed_source_keys=len(gdp_changed),
+        remerged_rows=int(dirty.sum()),
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Join N indicator sources onto a base table in a single pass."
+    )
+    parser.add_argument("--base", help="Base CSV (one row per output row)")
+    parser.add_argument(
+        "--source",
+        action="append",
+        default=[],
+        metavar="PATH|KEYS|COLUMNS",
+        help="Source spec, e.g. 'gdp.csv|country_code=Country_Code,year=Year|gdp'",
+    )
+    parser.add_argument(
+        "--config",
+        help="JSON file with {base, output, sources: [{path, keys, columns}]}; "
+        "relative paths resolve against the config file",
+    )
+    parser.add_argument("--out", help="Output CSV")
+    args = parser.parse_args(argv)
+
+    base, output = args.base, args.out
+    sources = [SourceSpec.parse(text) for text in args.source]
+    if args.config:
+        root = os.path.dirname(os.path.abspath(args.config))
+        with open(args.config, "r", encoding="utf-8") as fh:
+            config = json.load(fh)
+        base = base or os.path.join(root, config["base"])
+        output = output or os.path.join(root, config["output"])
+        for item in config.get("sources", []):
+            columns = item["columns"]
+            if isinstance(columns, list):
+                columns = {col: col for col in columns}
+            sources.append(
+                SourceSpec(os.path.join(root, item["path"]), dict(item["keys"]), dict(columns))
+            )
+
+    if not base or not output:
+        parser.error("--base and --out (or a --config providing them) are required")
+
+    result = multi_join(base, sources, output)
+    print(f"✓ Joined {len(sources)} source(s) onto {len(result)} rows -> {output}")
+
+
+if __name__ == "__main__":
+    main()
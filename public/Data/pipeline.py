@@ -0,0 +1,397 @@
+"""
+Dependency-tracked runner for the data and visualization stages.
+
+Each ``Stage`` declares the files it reads (``inputs``), the stages whose
+results it takes (``deps``), the files or folders it writes (``outputs``) and
+the source files its behaviour depends on (``code``). A stage's fingerprint is
+the content hash of all of those plus its upstream fingerprints. A stage runs
+only when its fingerprint differs from the recorded one or one of its outputs
+is missing or was changed since the last run; otherwise it is skipped.
+
+Results are handed between stages in memory. A stage without outputs (e.g.
+loading the combined CSV) is only run when a stage that needs it runs. When a
+skipped stage's result is needed downstream, its ``load`` rebuilds the result
+from its outputs instead of running it again.
+
+Stages whose dependencies are satisfied run concurrently in a thread pool.
+The recorded fingerprints live in ``.cache/pipeline/state.json``. Editing one
+cell of gdp.csv therefore only re-runs ``merge``, ``regions`` and ``figures``. Editing the
+combined CSV re-runs only the heatmap, the chart exports and the columnar snapshot.
+
+    python pipeline.py                  # run whatever is out of date
+    python pipeline.py --dry-run        # show what would run
+    python pipeline.py heatmap --force  # re-run one stage (and its dependencies)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+import pandas as pd
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+VIS_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "Visualization"))
+if VIS_DIR not in sys.path:
+    sys.path.append(VIS_DIR)
+
+from cache import file_sha256  # noqa: E402
+from dataset import DEFAULT_CSV, canonical_name, load_table  # noqa: E402
+from instrument import stage as instrument_stage  # noqa: E402
+
+STATE_VERSION = 1
+DEFAULT_STATE_PATH = os.path.join(CURRENT_DIR, ".cache", "pipeline", "state.json")
+
+
+@dataclass
+class Stage:
+    """One step of the pipeline.
+
+    ``run`` receives ``{dep name: result}`` and returns this stage's result.
+    ``load`` rebuilds that result from the stage's outputs when it is skipped
+    but a downstream stage needs it; without it the stage is run instead.
+    """
+
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    inputs: List[str] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    code: List[str] = field(default_factory=list)
+    load: Optional[Callable[[], Any]] = None
+    version: int = 1
+
+
+def path_digest(path: str) -> Optional[str]:
+    """Content hash of a file, or of every file under a folder; None if missing."""
+
+    if os.path.isfile(path):
+        return file_sha256(path)
+    if not os.path.isdir(path):
+        return None
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            digest.update(os.path.relpath(full, path).encode("utf-8"))
+            digest.update(file_sha256(full).encode("ascii"))
+    return digest.hexdigest()
+
+
+class Pipeline:
+    """A set of stages plus the fingerprints recorded for their last runs."""
+
+    def __init__(self, stages: Sequence[Stage], state_path: str = DEFAULT_STATE_PATH):
+        self.stages: Dict[str, Stage] = {}
+        for s in stages:
+            unknown = [d for d in s.deps if d not in self.stages]
+            if unknown:
+                raise ValueError(f"{s.name}: unknown or later dependency {', '.join(unknown)}")
+            self.stages[s.name] = s
+        self.state_path = state_path
+        self.state: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as fh:
+                saved = json.load(fh)
+            if saved.get("version") == STATE_VERSION:
+                self.state = saved["stages"]
+        self._lock = threading.Lock()
+        self._digests: Dict[str, Optional[str]] = {}
+
+    def _digest(self, path: str) -> Optional[str]:
+        if path not in self._digests:
+            self._digests[path] = path_digest(path)
+        return self._digests[path]
+
+    def fingerprints(self) -> Dict[str, str]:
+        """Fingerprint of every stage, in declaration (topological) order."""
+
+        fps: Dict[str, str] = {}
+        for name, s in self.stages.items():
+            parts = [
+                f"stage={name}:{s.version}",
+                *(f"in={os.path.abspath(p)}:{self._digest(p)}" for p in s.inputs),
+                *(f"code={os.path.basename(p)}:{self._digest(p)}" for p in s.code),
+                *(f"dep={d}:{fps[d]}" for d in s.deps),
+                *(f"out={os.path.abspath(p)}" for p in s.outputs),
+            ]
+            fps[name] = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+        return fps
+
+    def is_current(self, name: str, fingerprint: str) -> bool:
+        s, recorded = self.stages[name], self.state.get(name)
+        if not s.outputs or not recorded or recorded["fingerprint"] != fingerprint:
+            return False
+        # Outputs that were deleted or edited by hand count as stale
+        return all(recorded["outputs"].get(p) == path_digest(p) for p in map(os.path.abspath, s.outputs))
+
+    def plan(self, targets: Optional[Sequence[str]] = None, force: bool = False) -> Dict[str, str]:
+        """``{stage: "run" | "load" | "skip"}`` for the targets and their dependencies."""
+
+        targets = list(targets or self.stages)
+        wanted: Set[str] = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise KeyError(f"unknown stage {name!r}")
+            if name not in wanted:
+                wanted.add(name)
+                stack.extend(self.stages[name].deps)
+
+        fps = self.fingerprints()
+        actions = {
+            name: "run" if (force and name in targets) or not self.is_current(name, fps[name]) else "skip"
+            for name in self.stages if name in wanted
+        }
+        # Stages without outputs only run for a stage that needs them
+        for name in actions:
+            if not self.stages[name].outputs:
+                actions[name] = "skip"
+
+        # Walk downstream-first so each stage that runs pulls in what it needs
+        for name in reversed(list(actions)):
+            if actions[name] != "run":
+                continue
+            for dep in self.stages[name].deps:
+                if actions[dep] == "skip":
+                    actions[dep] = "load" if self.stages[dep].load else "run"
+        return actions
+
+    def _record(self, name: str, fingerprint: str) -> None:
+        s = self.stages[name]
+        with self._lock:
+            if s.outputs:
+                self.state[name] = {
+                    "fingerprint": fingerprint,
+                    "outputs": {p: path_digest(p) for p in map(os.path.abspath, s.outputs)},
+                }
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, "w", encoding="utf-8") as fh:
+                json.dump({"version": STATE_VERSION, "stages": self.state}, fh, indent=2)
+
+    def run(
+        self,
+        targets: Optional[Sequence[str]] = None,
+        force: bool = False,
+        workers: int = 4,
+        verbose: bool = True,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run the plan; returns ``{stage: {"action", "seconds", "error"}}``."""
+
+        actions = self.plan(targets, force)
+        fps = self.fingerprints()
+        results: Dict[str, Any] = {}
+        report: Dict[str, Dict[str, Any]] = {
+            name: {"action": action, "seconds": 0.0, "error": None} for name, action in actions.items()
+        }
+        pending = [name for name, action in actions.items() if action in ("run", "load")]
+        failed: Set[str] = set()
+
+        def execute(name: str) -> Any:
+            s = self.stages[name]
+            start = time.perf_counter()
+            with instrument_stage(f"pipeline:{name}"):
+                if actions[name] == "load":
+                    value = s.load()
+                else:
+                    value = s.run({d: results[d] for d in s.deps})
+            report[name]["seconds"] = time.perf_counter() - start
+            if actions[name] == "run":
+                self._record(name, fps[name])
+            return value
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            running: Dict[Future, str] = {}
+            while pending or running:
+                for name in list(pending):
+                    deps = [d for d in self.stages[name].deps if d in pending or d in failed
+                            or any(n == d for n in running.values())]
+                    if any(d in failed for d in self.stages[name].deps):
+                        pending.remove(name)
+                        failed.add(name)
+                        report[name]["error"] = "upstream stage failed"
+                    elif not deps:
+                        pending.remove(name)
+                        running[pool.submit(execute, name)] = name
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                        if verbose:
+                            verb = "Loaded" if actions[name] == "load" else "Ran"
+                            print(f"✓ {verb} {name} in {report[name]['seconds'] * 1000:.0f} ms")
+                    except Exception as exc:  # report and keep independent stages going
+                        failed.add(name)
+                        report[name]["error"] = f"{type(exc).__name__}: {exc}"
+                        if verbose:
+                            print(f"✗ {name} failed: {report[name]['error']}")
+
+        if verbose:
+            skipped = [name for name, action in actions.items() if action == "skip" and self.stages[name].outputs]
+            if skipped:
+                print(f"✓ Up to date: {', '.join(skipped)}")
+        return report
+
+
+# -------------------- Default stages --------------------
+
+
+def default_stages(out_dir: str = ".", combined_csv: str = DEFAULT_CSV) -> List[Stage]:
+    """The merge, heatmap, chart export, snapshot, region rollup and figure stages of this repository."""
+
+    from aggregates import aggregate
+    from export_chart_data import DEFAULT_OUT_ROOT as CHART_ROOT, SCHEMA_VERSION as CHART_VERSION, export_chart_data
+    from export_choropleth import (
+        DEFAULT_OUT_ROOT as CHOROPLETH_ROOT,
+        SCHEMA_VERSION as CHOROPLETH_VERSION,
+        export_choropleth,
+    )
+    from h import (
+        DUAL_AXIS_STYLE,
+        TRAJECTORY_STYLE,
+        YOY_STYLE,
+        draw_dual_axis,
+        draw_trajectory,
+        draw_yoy_change,
+        yearly_frames,
+    )
+    from heatmap import ensure_output_dir, make_interactive_heatmap
+    from merge import full_gdp_merge
+    from regions import (
+        DEFAULT_OUT_ROOT as REGIONS_ROOT,
+        REGIONS_CSV,
+        SCHEMA_VERSION as REGIONS_VERSION,
+        export_regions,
+    )
+    from render import FigureJob, render_figures
+    from snapshot import DEFAULT_OUT_DIR as SNAPSHOT_DIR, build_snapshot
+
+    main_csv = os.path.join(CURRENT_DIR, "main.csv")
+    gdp_csv = os.path.join(CURRENT_DIR, "gdp.csv")
+    merged_csv = os.path.join(CURRENT_DIR, "final_with_gdp.csv")
+    heatmap_html = os.path.join(out_dir, "group2_crime_inequality", "images", "interactions",
+                                "interactive_crime_heatmap.html")
+    figures = {
+        "trajectory": os.path.join(out_dir, "renewable_energy_trajectory_area_chart.png"),
+        "dual_axis": os.path.join(out_dir, "renewable_energy_urbanization_dual_axis.png"),
+        "yoy_change": os.path.join(out_dir, "renewable_energy_yoy_change_area_chart.png"),
+    }
+
+    def code(*names: str) -> List[str]:
+        return [os.path.join(CURRENT_DIR if os.path.exists(os.path.join(CURRENT_DIR, n)) else VIS_DIR, n)
+                for n in names]
+
+    def merge(_: Dict[str, Any]) -> pd.DataFrame:
+        merged = full_gdp_merge(main_csv, gdp_csv, merged_csv)
+        return merged.rename(columns=canonical_name)
+
+    def heatmap(deps: Dict[str, Any]) -> str:
+        return make_interactive_heatmap(deps["combined"], ensure_output_dir(out_dir))
+
+    def draw_figures(deps: Dict[str, Any]) -> Dict[str, str]:
+        renewable_data, comparison_data = yearly_frames(
+            aggregate(deps["merge"], by=["year"], weight="total_pop")
+        )
+        jobs = [
+            FigureJob("trajectory", draw_trajectory, renewable_data, figures["trajectory"], TRAJECTORY_STYLE),
+            FigureJob("dual_axis", draw_dual_axis, comparison_data, figures["dual_axis"], DUAL_AXIS_STYLE),
+            FigureJob("yoy_change", draw_yoy_change, renewable_data, figures["yoy_change"], YOY_STYLE),
+        ]
+        # Serial inside the stage: the runner already runs stages side by side
+        return render_figures(jobs, processes=1)
+
+    return [
+        Stage(
+            "combined",
+            run=lambda _: load_table(combined_csv, compact=False),
+            inputs=[combined_csv],
+            code=code("dataset.py"),
+        ),
+        Stage(
+            "merge",
+            run=merge,
+            inputs=[main_csv, gdp_csv],
+            outputs=[merged_csv],
+            code=code("merge.py"),
+            load=lambda: load_table(merged_csv, compact=False),
+        ),
+        Stage(
+            "heatmap",
+            run=heatmap,
+            deps=["combined"],
+            outputs=[heatmap_html],
+            code=code("heatmap.py", "sketch.py"),
+        ),
+        Stage(
+            "chart_data",
+            run=lambda deps: export_chart_data(combined_csv, CHART_ROOT, df=deps["combined"]),
+            deps=["combined"],
+            outputs=[os.path.join(CHART_ROOT, f"v{CHART_VERSION}")],
+            code=code("export_chart_data.py", "heatmap.py", "aggregates.py"),
+        ),
+        Stage(
+            "choropleth",
+            run=lambda deps: export_choropleth(combined_csv, CHOROPLETH_ROOT, df=deps["combined"]),
+            deps=["combined"],
+            outputs=[os.path.join(CHOROPLETH_ROOT, f"v{CHOROPLETH_VERSION}")],
+            code=code("export_choropleth.py"),
+        ),
+        Stage(
+            "snapshot",
+            run=lambda _: build_snapshot(combined_csv, SNAPSHOT_DIR),
+            inputs=[combined_csv],
+            outputs=[SNAPSHOT_DIR],
+            code=code("snapshot.py"),
+        ),
+        Stage(
+            "regions",
+            run=lambda _: export_regions(gdp_csv, REGIONS_ROOT, REGIONS_CSV),
+            inputs=[gdp_csv, REGIONS_CSV],
+            outputs=[os.path.join(REGIONS_ROOT, f"v{REGIONS_VERSION}")],
+            code=code("regions.py", "aggregates.py"),
+        ),
+        Stage(
+            "figures",
+            run=draw_figures,
+            deps=["merge"],
+            outputs=list(figures.values()),
+            code=code("h.py", "render.py", "aggregates.py"),
+        ),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the out-of-date pipeline stages.")
+    parser.add_argument("targets", nargs="*", help="Stages to bring up to date (default: all)")
+    parser.add_argument("--out-dir", default=".", help="Where the heatmap and figures are written")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="Combined CSV for the heatmap and exports")
+    parser.add_argument("--force", action="store_true", help="Re-run the targets even if up to date")
+    parser.add_argument("--workers", type=int, default=4, help="Stages run at the same time")
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would run")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH)
+    args = parser.parse_args()
+
+    pipeline = Pipeline(default_stages(os.path.abspath(args.out_dir), args.csv), args.state)
+    if args.dry_run:
+        for name, action in pipeline.plan(args.targets, args.force).items():
+            print(f"  {name:<12} {action}")
+        return
+
+    report = pipeline.run(args.targets, args.force, args.workers)
+    if any(r["error"] for r in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
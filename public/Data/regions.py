@@ -0,0 +1,268 @@
+"""
+Country vs. aggregate classification and our own region / income-group rollups.
+
+``gdp.csv`` mixes the 217 World Bank economies with 49 aggregate rows ("World",
+"Africa Eastern and Southern", "High income", ...). ``regions.csv`` is the
+mapping table that settles this once per code: ``kind`` is ``country`` or
+``aggregate``, countries carry their World Bank ``region`` and
+``income_group``, and the aggregates that correspond to one of our rollups name
+it in ``rollup`` (e.g. ``SSF`` -> ``region:Sub-Saharan Africa``).
+
+``region_rollups`` stacks the country rows once per level (world, region,
+income group) and reduces everything in a single :func:`aggregates.aggregate`
+pass. Totals (population, GDP, CO2) are summed; shares and per-capita
+indicators are population-weighted means; population density is total
+population over total land area (a population-weighted harmonic mean of the
+densities). A rollup therefore only ever summarizes the country rows it is
+built from, unlike the World Bank aggregates, which impute missing members.
+
+``export_regions`` writes ``classification.json`` (code -> kind, region,
+income group, plus the member codes of every group) and ``rollups.json``
+(level -> group -> indicator -> one value per year) to
+``public/chart-data/regions/v<N>/`` so the dashboard filters countries and
+reads regional series with lookups instead of string checks on each row.
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aggregates import aggregate, numeric_columns
+from cache import file_sha256
+from dataset import ID_COLUMNS, load_table
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+REGIONS_CSV = os.path.join(CURRENT_DIR, "regions.csv")
+DEFAULT_SOURCE = os.path.join(CURRENT_DIR, "gdp.csv")
+DEFAULT_OUT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", "chart-data", "regions"))
+SCHEMA_VERSION = 1
+
+LEVELS: Tuple[str, ...] = ("world", "region", "income_group")
+WEIGHT = "total_pop"
+# Indicators that add up across countries; everything else is a population-weighted mean
+SUM_COLUMNS = {"total_pop", "gdp", "co2_emiss_excl_lulucf"}
+# Densities average harmonically so that the result is total population / total area
+HARMONIC_COLUMNS = {"pop_dens_sq_km"}
+
+
+def load_classification(path: str = REGIONS_CSV) -> pd.DataFrame:
+    """The mapping table, indexed by ``country_code``."""
+
+    table = pd.read_csv(path, dtype=str, keep_default_na=False).set_index("country_code")
+    bad = sorted(set(table["kind"]) - {"country", "aggregate"})
+    if bad:
+        raise ValueError(f"{os.path.basename(path)}: unknown kind {', '.join(bad)}")
+    return table
+
+
+def classify(df: pd.DataFrame, classification: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """``df`` with ``kind``, ``region`` and ``income_group`` joined on ``country_code``."""
+
+    classification = load_classification() if classification is None else classification
+    codes = df["country_code"].astype(str)
+    unknown = sorted(set(codes) - set(classification.index))
+    if unknown:
+        raise ValueError(f"country codes missing from the classification table: {', '.join(unknown)}")
+    joined = classification.loc[codes, ["kind", "region", "income_group"]]
+    return df.assign(**{col: joined[col].to_numpy() for col in joined.columns})
+
+
+def split_panel(
+    df: pd.DataFrame, classification: Optional[pd.DataFrame] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """``(country rows, aggregate rows)`` of a panel, both with their classification."""
+
+    classified = classify(df, classification)
+    is_country = (classified["kind"] == "country").to_numpy()
+    return classified[is_country], classified[~is_country]
+
+
+def region_rollups(
+    countries: pd.DataFrame,
+    columns: Optional[Sequence[str]] = None,
+    levels: Sequence[str] = LEVELS,
+) -> pd.DataFrame:
+    """Rollups indexed by ``(level, group, year)``, one column per indicator.
+
+    ``countries`` are classified country rows (see :func:`split_panel`).
+    ``n_countries`` counts the member rows of each group and year and
+    ``<indicator>_n`` how many of them report the indicator.
+    """
+
+    columns = list(columns) if columns is not None else numeric_columns(
+        countries, exclude=ID_COLUMNS + [WEIGHT]
+    )
+    columns = [c for c in columns if c != WEIGHT]
+    harmonic = [c for c in columns if c in HARMONIC_COLUMNS]
+
+    base = countries[["year", WEIGHT] + columns].copy()
+    with np.errstate(divide="ignore"):
+        for col in harmonic:
+            base[col] = 1.0 / base[col].where(base[col] > 0)
+    base[WEIGHT + "_total"] = base[WEIGHT]
+
+    # Every country row once per level, so one grouped pass covers all levels
+    stacked = []
+    for level in levels:
+        group = "World" if level == "world" else countries[level]
+        part = base.assign(level=level, group=group)
+        stacked.append(part[part["group"].astype(bool)])
+    stacked = pd.concat(stacked, ignore_index=True)
+
+    value_columns = [WEIGHT + "_total"] + columns
+    agg = aggregate(stacked, by=["level", "group", "year"], weight=WEIGHT, columns=value_columns)
+
+    out = pd.DataFrame(index=agg.index)
+    out["n_countries"] = agg[("_rows", "count")].astype(np.int64)
+    for col in value_columns:
+        name = WEIGHT if col == WEIGHT + "_total" else col
+        if name in SUM_COLUMNS:
+            values = agg[(col, "sum")].where(agg[(col, "count")] > 0)
+        else:
+            values = agg[(col, "wmean")]
+            if col in HARMONIC_COLUMNS:
+                values = 1.0 / values
+        out[name] = values
+        out[f"{name}_n"] = agg[(col, "count")].astype(np.int64)
+
+    order = {level: i for i, level in enumerate(levels)}
+    out = out.reset_index()
+    out = out.sort_values(["level", "group", "year"], key=lambda s: s.map(order) if s.name == "level" else s)
+    return out.set_index(["level", "group", "year"])
+
+
+def compare_with_source(
+    rollups: pd.DataFrame,
+    aggregates_df: pd.DataFrame,
+    classification: pd.DataFrame,
+    column: str = WEIGHT,
+) -> pd.DataFrame:
+    """Our rollup next to the source's own aggregate row for the same group and year."""
+
+    mapped = classification.loc[classification["rollup"] != "", "rollup"]
+    rows = aggregates_df[aggregates_df["country_code"].isin(mapped.index)]
+    level_group = mapped.loc[rows["country_code"]].str.split(":", n=1, expand=True)
+    source = pd.Series(
+        rows[column].to_numpy(),
+        index=pd.MultiIndex.from_arrays(
+            [level_group[0].to_numpy(), level_group[1].to_numpy(), rows["year"].to_numpy()],
+            names=["level", "group", "year"],
+        ),
+    )
+    table = pd.DataFrame({"rollup": rollups[column], "source": source}).dropna()
+    table["rel_diff"] = (table["rollup"] - table["source"]) / table["source"]
+    return table
+
+
+def _json_values(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+def export_regions(
+    csv_path: str = DEFAULT_SOURCE,
+    out_root: Optional[str] = None,
+    classification_path: str = REGIONS_CSV,
+    df: Optional[pd.DataFrame] = None,
+) -> str:
+    """Write ``classification.json`` and ``rollups.json``; returns the output directory."""
+
+    out_dir = os.path.join(out_root or DEFAULT_OUT_ROOT, f"v{SCHEMA_VERSION}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    classification = load_classification(classification_path)
+    if df is None:
+        df = load_table(csv_path, compact=False)
+    countries, _ = split_panel(df, classification)
+    rollups = region_rollups(countries)
+
+    members: Dict[str, Dict[str, List[str]]] = {"region": {}, "incomeGroup": {}}
+    country_table = classification[classification["kind"] == "country"]
+    for level, key in (("region", "region"), ("income_group", "incomeGroup")):
+        for group, codes in country_table.groupby(level).groups.items():
+            if group:
+                members[key][group] = sorted(codes)
+
+    index = {
+        "version": SCHEMA_VERSION,
+        "source": os.path.basename(classification_path),
+        "source_sha256": file_sha256(classification_path),
+        "codes": {
+            code: {
+                "name": row.country,
+                "kind": row.kind,
+                "region": row.region or None,
+                "incomeGroup": row.income_group or None,
+                "rollup": row.rollup or None,
+            }
+            for code, row in classification.iterrows()
+        },
+        "members": members,
+    }
+    with open(os.path.join(out_dir, "classification.json"), "w", encoding="utf-8") as fh:
+        json.dump(index, fh, indent=1)
+
+    years = sorted(int(y) for y in rollups.index.get_level_values("year").unique())
+    indicators = [c for c in rollups.columns if not c.endswith("_n") and c != "n_countries"]
+    values: Dict[str, Dict[str, Dict[str, List[Optional[float]]]]] = {}
+    for (level, group), block in rollups.groupby(level=["level", "group"], sort=False):
+        block = block.droplevel(["level", "group"]).reindex(years)
+        series = {"nCountries": _json_values(block["n_countries"].to_numpy(dtype="float64"))}
+        for col in indicators:
+            series[col] = _json_values(block[col].to_numpy(dtype="float64"))
+        values.setdefault(level, {})[group] = series
+
+    payload = {
+        "version": SCHEMA_VERSION,
+        "source": os.path.basename(csv_path),
+        "source_sha256": file_sha256(csv_path),
+        "years": years,
+        "indicators": indicators,
+        "sum": sorted(c for c in indicators if c in SUM_COLUMNS),
+        "values": values,
+    }
+    with open(os.path.join(out_dir, "rollups.json"), "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, separators=(",", ":"))
+
+    return out_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Classify codes and build region / income-group rollups.")
+    parser.add_argument("--csv", default=DEFAULT_SOURCE)
+    parser.add_argument("--classification", default=REGIONS_CSV)
+    parser.add_argument("--out", default=DEFAULT_OUT_ROOT, help="Root folder; files go to <out>/v<N>/")
+    parser.add_argument("--check", action="store_true",
+                        help="Re-derive the rollups with pandas and compare with the source's aggregate rows")
+    args = parser.parse_args()
+
+    df = load_table(args.csv, compact=False)
+    out_dir = export_regions(args.csv, args.out, args.classification, df=df)
+
+    classification = load_classification(args.classification)
+    countries, aggregates_df = split_panel(df, classification)
+    print(
+        f"✓ {countries['country_code'].nunique()} countries and "
+        f"{aggregates_df['country_code'].nunique()} aggregates -> {out_dir}"
+    )
+    if not args.check:
+        return
+
+    rollups = region_rollups(countries)
+    # The same sums with a plain groupby over the country rows
+    by_region = countries.groupby(["region", "year"])[["total_pop", "gdp"]].sum(min_count=1)
+    ours = rollups.loc["region"][["total_pop", "gdp"]]
+    print(f"✓ region sums match a pandas groupby: {np.allclose(ours, by_region.loc[ours.index], equal_nan=True)}")
+
+    table = compare_with_source(rollups, aggregates_df, classification)
+    worst = table["rel_diff"].abs().groupby(level=["level", "group"]).max()
+    print("Population vs. the source's own aggregate rows (largest relative difference):")
+    for (level, group), diff in worst.items():
+        print(f"  {level:<13} {group:<28} {diff:.4%}")
+
+
+if __name__ == "__main__":
+    main()
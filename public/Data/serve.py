@@ -0,0 +1,427 @@
+"""
+Local HTTP service answering slice and aggregate queries on the panel.
+
+A stand-in for the production data API: server components fetch only the rows
+and indicators a chart needs instead of parsing the whole CSV per request.
+The panel is loaded once through ``dataset.load_table`` into a columnar store
+(one NumPy array per column, integer codes for the group keys), and every
+query is a boolean mask over those arrays.
+
+Endpoints (GET or HEAD, JSON responses):
+
+- ``/meta``: countries, years, indicators and group-by keys
+- ``/slice``: the selected rows, as ``{"rows": n, "columns": {name: [...]}}``
+- ``/aggregate``: per-group ``count``/``mean``/``wmean`` of every indicator
+- ``/health``: row count, data version and cache statistics
+
+Query parameters (comma-separated lists; names or aliases as in dataset.py):
+``countries`` (names or ISO codes), ``year_from``, ``year_to``, ``indicators``,
+``group_by`` (``year``, ``country``, ``cluster_label``, ``gini_tertile``,
+``urban_tertile``) and ``weight`` (e.g. ``total_pop``).
+
+Responses carry an ETag derived from the CSV content hash and the normalised
+query, so ``If-None-Match`` is answered with 304 before anything is computed.
+Bodies are gzipped when the client accepts it, and both encodings are kept in
+an LRU cache keyed on the normalised query.
+
+    python serve.py --port 8765
+    curl 'http://127.0.0.1:8765/aggregate?group_by=cluster_label,year&indicators=homicide_rate&weight=total_pop'
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from aggregates import aggregate
+from cache import file_sha256
+from dataset import DEFAULT_CSV, canonical_name, load_table
+
+TERTILE_LABELS = {
+    "gini_tertile": ["Low inequality", "Mid inequality", "High inequality"],
+    "urban_tertile": ["Low urban", "Mid urban", "High urban"],
+}
+GZIP_MIN_BYTES = 1024
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+class QueryError(ValueError):
+    """A query the store cannot answer; reported to the client as a 400."""
+
+
+@dataclass(frozen=True)
+class Query:
+    """A normalised query; equal queries share one ETag and cache entry."""
+
+    countries: Optional[Tuple[str, ...]]
+    year_from: Optional[int]
+    year_to: Optional[int]
+    indicators: Tuple[str, ...]
+    group_by: Tuple[str, ...] = ()
+    weight: Optional[str] = None
+
+
+class PanelStore:
+    """The panel as one array per column, loaded once."""
+
+    def __init__(self, csv_path: str = DEFAULT_CSV):
+        df = load_table(csv_path, compact=False)
+        self.csv_path = csv_path
+        self.version = file_sha256(csv_path)[:16]
+        self.rows = len(df)
+
+        self.country = df["country"].astype(str).to_numpy()
+        self.country_code = df["country_code"].astype(str).to_numpy()
+        self.year = df["year"].to_numpy()
+        self.indicators = [
+            c for c in df.columns
+            if c not in ("country", "country_code", "year", "cluster_label")
+            and pd.api.types.is_numeric_dtype(df[c])
+        ]
+        self.values: Dict[str, np.ndarray] = {c: df[c].to_numpy(dtype="float64") for c in self.indicators}
+
+        # Group keys as (codes, labels); code -1 means "not in any group"
+        self.groups: Dict[str, Tuple[np.ndarray, List[Any]]] = {}
+        for key in ("year", "country", "cluster_label"):
+            if key in df.columns:
+                codes, labels = pd.factorize(df[key], sort=True)
+                self.groups[key] = (codes, [_plain(v) for v in labels])
+        self._add_tertiles()
+
+        # Countries can be asked for by name or ISO code, in any case
+        self._country_lookup: Dict[str, str] = {}
+        for name, code in zip(self.country, self.country_code):
+            self._country_lookup[name.lower()] = name
+            self._country_lookup[code.lower()] = name
+
+    def _add_tertiles(self) -> None:
+        """Gini and urbanization tertiles over the whole panel, as in heatmap.py."""
+
+        gini, urban = self.values.get("gini_coefficient"), self.values.get("urban_pop_perc")
+        if gini is None or urban is None:
+            return
+        both = ~np.isnan(gini) & ~np.isnan(urban)
+        for key, values in (("gini_tertile", gini), ("urban_tertile", urban)):
+            codes = np.full(self.rows, -1, dtype=np.int64)
+            codes[both] = pd.qcut(values[both], 3, labels=False)
+            self.groups[key] = (codes, TERTILE_LABELS[key])
+
+    def parse(self, params: Dict[str, List[str]], grouped: bool) -> Query:
+        """Validate and normalise query-string parameters."""
+
+        def listed(name: str) -> List[str]:
+            return [v.strip() for raw in params.get(name, []) for v in raw.split(",") if v.strip()]
+
+        def year(name: str) -> Optional[int]:
+            raw = listed(name)
+            if not raw:
+                return None
+            try:
+                return int(raw[-1])
+            except ValueError:
+                raise QueryError(f"{name} must be a year, got {raw[-1]!r}")
+
+        countries = None
+        if listed("countries"):
+            unknown = [c for c in listed("countries") if c.lower() not in self._country_lookup]
+            if unknown:
+                raise QueryError(f"unknown countries: {', '.join(unknown)}")
+            countries = tuple(sorted({self._country_lookup[c.lower()] for c in listed("countries")}))
+
+        indicators = []
+        for name in listed("indicators") or self.indicators:
+            canonical = canonical_name(name)
+            if canonical not in self.values:
+                raise QueryError(f"unknown indicator: {name}")
+            if canonical not in indicators:
+                indicators.append(canonical)
+
+        group_by: List[str] = []
+        weight = None
+        if grouped:
+            for name in listed("group_by") or ["year"]:
+                key = canonical_name(name)
+                if key not in self.groups:
+                    raise QueryError(f"cannot group by {name}; use one of {', '.join(self.groups)}")
+                if key not in group_by:
+                    group_by.append(key)
+            if listed("weight"):
+                weight = canonical_name(listed("weight")[-1])
+                if weight not in self.values:
+                    raise QueryError(f"unknown weight column: {listed('weight')[-1]}")
+
+        return Query(countries, year("year_from"), year("year_to"), tuple(indicators), tuple(group_by), weight)
+
+    def mask(self, query: Query) -> np.ndarray:
+        keep = np.ones(self.rows, dtype=bool)
+        if query.countries is not None:
+            keep &= np.isin(self.country, query.countries)
+        if query.year_from is not None:
+            keep &= self.year >= query.year_from
+        if query.year_to is not None:
+            keep &= self.year <= query.year_to
+        return keep
+
+    def slice(self, query: Query) -> Dict[str, Any]:
+        keep = self.mask(query)
+        columns: Dict[str, List[Any]] = {
+            "country": self.country[keep].tolist(),
+            "country_code": self.country_code[keep].tolist(),
+            "year": self.year[keep].tolist(),
+        }
+        if "cluster_label" in self.groups:
+            codes, labels = self.groups["cluster_label"]
+            columns["cluster_label"] = [labels[c] if c >= 0 else None for c in codes[keep]]
+        for name in query.indicators:
+            columns[name] = _floats(self.values[name][keep])
+        return {"rows": int(keep.sum()), "columns": columns}
+
+    def aggregate(self, query: Query) -> Dict[str, Any]:
+        keep = self.mask(query)
+        frame = {f"_{key}": self.groups[key][0][keep] for key in query.group_by}
+        needed = list(query.indicators) + ([query.weight] if query.weight else [])
+        for name in dict.fromkeys(needed):
+            frame[name] = self.values[name][keep]
+        frame = pd.DataFrame(frame)
+        # Code -1 marks rows outside every group (e.g. no tertile); drop them
+        by = [f"_{key}" for key in query.group_by]
+        frame = frame[(frame[by] >= 0).all(axis=1)]
+
+        result = aggregate(frame, by=by, weight=query.weight, columns=list(query.indicators))
+        index = result.index.to_frame(index=False)
+        keys = {
+            key: [self.groups[key][1][int(c)] for c in index[f"_{key}"]] for key in query.group_by
+        }
+        stats = ["count", "mean"] + (["wmean"] if query.weight else [])
+        return {
+            "groups": len(result),
+            "keys": keys,
+            "rows": result[("_rows", "count")].astype(int).tolist(),
+            "weight": query.weight,
+            "stats": {
+                name: {
+                    stat: result[(name, stat)].astype(int).tolist() if stat == "count"
+                    else _floats(result[(name, stat)].to_numpy())
+                    for stat in stats
+                }
+                for name in query.indicators
+            },
+        }
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "rows": self.rows,
+            "countries": sorted(set(self.country.tolist())),
+            "years": sorted(set(self.year.tolist())),
+            "indicators": self.indicators,
+            "group_by": list(self.groups),
+        }
+
+
+def _plain(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _floats(values: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in values.tolist()]
+
+
+class ResultCache:
+    """LRU of encoded responses: ``key -> (etag, body, gzipped body)``."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Tuple, Tuple[str, bytes, Optional[bytes]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Tuple[str, bytes, Optional[bytes]]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple, entry: Tuple[str, bytes, Optional[bytes]]) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+def etag_for(version: str, route: str, query: Optional[Query]) -> str:
+    digest = hashlib.sha1(repr((version, route, query)).encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or any((t[2:] if t.startswith("W/") else t) == etag for t in tags)
+
+
+class QueryService:
+    """Routes requests to the store and handles caching, ETags and gzip."""
+
+    def __init__(self, store: PanelStore, cache_size: int = 256):
+        self.store = store
+        self.cache = ResultCache(cache_size)
+        self.started = time.time()
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        if method not in ("GET", "HEAD"):
+            return self._error(405, f"{method} not allowed", {"Allow": "GET, HEAD"})
+
+        url = urlsplit(target)
+        route = url.path.rstrip("/") or "/"
+        params = parse_qs(url.query)
+
+        if route == "/health":
+            return self._json(200, {
+                "rows": self.store.rows,
+                "version": self.store.version,
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "cache": {"entries": len(self.cache.entries), "hits": self.cache.hits, "misses": self.cache.misses},
+            }, {"Cache-Control": "no-store"})
+        if route not in ("/meta", "/slice", "/aggregate"):
+            return self._error(404, f"no such endpoint: {route}")
+
+        try:
+            query = None if route == "/meta" else self.store.parse(params, grouped=route == "/aggregate")
+        except QueryError as exc:
+            return self._error(400, str(exc))
+
+        etag = etag_for(self.store.version, route, query)
+        common = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag_matches(headers.get("if-none-match"), etag):
+            return 304, common, b""
+
+        key = (route, query)
+        entry = self.cache.get(key)
+        if entry is None:
+            if route == "/meta":
+                payload = self.store.meta()
+            elif route == "/slice":
+                payload = self.store.slice(query)
+            else:
+                payload = self.store.aggregate(query)
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            zipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+            entry = (etag, body, zipped)
+            self.cache.put(key, entry)
+
+        _, body, zipped = entry
+        if zipped is not None and "gzip" in headers.get("accept-encoding", ""):
+            return 200, {**common, "Content-Type": "application/json", "Content-Encoding": "gzip"}, zipped
+        return 200, {**common, "Content-Type": "application/json"}, body
+
+    def _json(self, status: int, payload: Any, extra: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return status, {"Content-Type": "application/json", **(extra or {})}, body
+
+    def _error(self, status: int, message: str, extra: Optional[Dict[str, str]] = None):
+        return self._json(status, {"error": message}, extra)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one connection until it closes."""
+
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._write(writer, *self._error(400, "malformed request line"), close=True)
+                    break
+
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length:
+                    await reader.readexactly(length)
+
+                connection = headers.get("connection", "").lower()
+                close = connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive")
+                status, out_headers, body = self.respond(method, target, headers)
+                await self._write(writer, status, out_headers, body, head=method == "HEAD", close=close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        head: bool = False,
+        close: bool = False,
+    ) -> None:
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        headers = {**headers, "Content-Length": str(len(body))}
+        if close:
+            headers["Connection"] = "close"
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if body and not head and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+
+async def serve(csv_path: str, host: str, port: int, cache_size: int) -> None:
+    start = time.perf_counter()
+    service = QueryService(PanelStore(csv_path), cache_size)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(
+        f"✓ Loaded {service.store.rows} rows x {len(service.store.indicators)} indicators "
+        f"in {(time.perf_counter() - start) * 1000:.0f} ms; serving on http://{host}:{port}"
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve slice/aggregate queries on the panel over HTTP.")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-size", type=int, default=256, help="Responses kept in the LRU cache")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.csv, args.host, args.port, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
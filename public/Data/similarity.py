@@ -0,0 +1,192 @@
+"""
+"Countries like X": nearest-neighbour search over the standardized indicator space.
+
+Every numeric indicator is z-scored with the mean/std of the full panel, so
+averaged profiles and single-year rows live in the same space and distances are
+comparable across years. Missing values become 0 after scaling (the panel
+mean), which keeps sparse indicators from dominating a distance. Any of the
+panel CSVs works as input; aggregate rows ("World", income groups) are dropped
+via ``regions.csv`` so they never show up as a country's neighbours. Each
+``SimilarityIndex`` wraps a ``scipy.spatial.cKDTree`` and answers k-nearest and
+radius queries in O(log n) instead of a brute-force pass over every pair.
+
+``build_similarity_indexes`` returns one index for the averaged profiles
+(key ``None``) and one per year. Results are cached on the CSV's content hash
+under ``.cache/similarity``.
+"""
+
+import argparse
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from aggregates import numeric_columns
+from cache import cached
+from dataset import ID_COLUMNS, load_table
+from regions import split_panel
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(CURRENT_DIR, "combined_urbanization_life_quality_2008_2020.csv")
+DEFAULT_CACHE_DIR = os.path.join(CURRENT_DIR, ".cache", "similarity")
+CACHE_VERSION = 2
+
+
+@dataclass
+class SimilarityIndex:
+    """KD-tree over standardized country vectors for one year (or the average)."""
+
+    countries: List[str]
+    columns: List[str]
+    vectors: np.ndarray
+    tree: cKDTree
+    year: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        self._position = {country: i for i, country in enumerate(self.countries)}
+
+    def __len__(self) -> int:
+        return len(self.countries)
+
+    def _vector(self, country: str) -> np.ndarray:
+        if country not in self._position:
+            where = "averaged profiles" if self.year is None else f"year {self.year}"
+            raise KeyError(f"{country!r} is not in the similarity index for {where}")
+        return self.vectors[self._position[country]]
+
+    def nearest(self, country: str, k: int = 5) -> List[Tuple[str, float]]:
+        """The ``k`` most similar countries (excluding ``country``) with distances."""
+
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return []
+        distances, idx = self.tree.query(self._vector(country), k=k + 1)
+        own = self._position[country]
+        hits = [(self.countries[i], float(d)) for d, i in zip(distances, idx) if i != own]
+        return hits[:k]
+
+    def within(self, country: str, radius: float) -> List[Tuple[str, float]]:
+        """Every other country within ``radius`` (Euclidean, in std units), closest first."""
+
+        vector = self._vector(country)
+        own = self._position[country]
+        idx = [i for i in self.tree.query_ball_point(vector, r=radius) if i != own]
+        distances = np.linalg.norm(self.vectors[idx] - vector, axis=1) if idx else []
+        return sorted(((self.countries[i], float(d)) for i, d in zip(idx, distances)), key=lambda t: t[1])
+
+    def neighbour_table(self, k: int = 5) -> pd.DataFrame:
+        """Precomputed top-``k`` table: one row per (country, rank)."""
+
+        k = min(k, len(self) - 1)
+        distances, idx = self.tree.query(self.vectors, k=k + 1)
+        rows = []
+        for own, (dist_row, idx_row) in enumerate(zip(distances, idx)):
+            hits = [(i, d) for i, d in zip(idx_row, dist_row) if i != own][:k]
+            for rank, (i, d) in enumerate(hits, start=1):
+                rows.append((self.countries[own], rank, self.countries[i], float(d)))
+        table = pd.DataFrame(rows, columns=["country", "rank", "neighbour", "distance"])
+        table.insert(0, "year", pd.array([self.year] * len(table), dtype="Int64"))
+        return table
+
+
+def standardize_panel(
+    df: pd.DataFrame, columns: Optional[Sequence[str]] = None
+) -> Tuple[pd.DataFrame, List[str]]:
+    """Z-score ``columns`` with panel-wide statistics; NaN becomes 0 (the mean)."""
+
+    columns = list(columns or numeric_columns(df, exclude=ID_COLUMNS))
+    values = df[columns].astype("float64")
+    std = values.std(ddof=0)
+    scaled = (values - values.mean()) / std.where(std > 0)
+    scaled = scaled.fillna(0.0)
+    keys = df[["country", "year"]].reset_index(drop=True)
+    return pd.concat([keys, scaled.reset_index(drop=True)], axis=1), columns
+
+
+def _make_index(frame: pd.DataFrame, columns: List[str], year: Optional[int]) -> SimilarityIndex:
+    vectors = np.ascontiguousarray(frame[columns].to_numpy(dtype="float64"))
+    return SimilarityIndex(
+        countries=[str(c) for c in frame["country"]],
+        columns=columns,
+        vectors=vectors,
+        tree=cKDTree(vectors),
+        year=year,
+    )
+
+
+def build_similarity_indexes(
+    df: pd.DataFrame, columns: Optional[Sequence[str]] = None
+) -> Dict[Optional[int], SimilarityIndex]:
+    """One index over the averaged profiles (key ``None``) plus one per year.
+
+    ``df`` has canonical column names (see ``dataset.load_table``); rows the
+    classification table marks as aggregates are left out.
+    """
+
+    if "country_code" in df.columns:
+        df, _ = split_panel(df)
+    df = df[df["country"].notna()].assign(country=lambda d: d["country"].astype(str).str.strip())
+    scaled, columns = standardize_panel(df, columns)
+
+    averaged = scaled.groupby("country", sort=True)[columns].mean().reset_index()
+    indexes: Dict[Optional[int], SimilarityIndex] = {None: _make_index(averaged, columns, None)}
+    for year, frame in scaled.groupby("year", sort=True):
+        # Countries with several rows in a year keep the first
+        frame = frame.drop_duplicates("country").sort_values("country")
+        indexes[int(year)] = _make_index(frame, columns, int(year))
+    return indexes
+
+
+def load_similarity_indexes(
+    path: str = DEFAULT_CSV,
+    columns: Optional[Sequence[str]] = None,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+) -> Dict[Optional[int], SimilarityIndex]:
+    """Return :func:`build_similarity_indexes` for a CSV file, cached on its content hash."""
+
+    return cached(
+        path,
+        ("similarity", CACHE_VERSION, None if columns is None else list(columns)),
+        build=lambda: build_similarity_indexes(load_table(path, compact=False), columns),
+        # The tree pickles on its own; the rest are plain fields
+        dump=lambda indexes: {
+            year: (ix.countries, ix.columns, ix.vectors, ix.tree, ix.year) for year, ix in indexes.items()
+        },
+        load=lambda state: {year: SimilarityIndex(*fields) for year, fields in state.items()},
+        cache_dir=cache_dir,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find countries with similar indicator profiles.")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--country", help="Country to look up")
+    parser.add_argument("--year", type=int, help="Compare a single year instead of averaged profiles")
+    parser.add_argument("-k", type=int, default=5, help="Number of neighbours")
+    parser.add_argument("--radius", type=float, help="Return every country within this distance instead")
+    parser.add_argument("--table", help="Write the top-k neighbour table for every index to this CSV")
+    args = parser.parse_args()
+
+    indexes = load_similarity_indexes(args.csv)
+
+    if args.table:
+        table = pd.concat([index.neighbour_table(args.k) for index in indexes.values()], ignore_index=True)
+        table.to_csv(args.table, index=False)
+        print(f"✓ Top-{args.k} neighbour table ({len(table)} rows) -> {args.table}")
+
+    if args.country:
+        if args.year is not None and args.year not in indexes:
+            parser.error(f"no data for year {args.year}")
+        index = indexes[args.year]
+        hits = index.within(args.country, args.radius) if args.radius is not None else index.nearest(args.country, args.k)
+        scope = "averaged profile" if args.year is None else str(args.year)
+        print(f"Countries most similar to {args.country} ({scope}, {len(index.columns)} indicators):")
+        for rank, (country, distance) in enumerate(hits, start=1):
+            print(f"  {rank:2d}. {country:<30} {distance:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Schema-faithful synthetic versions of the pipeline's CSV inputs, at any scale.
+
+The real tables are tiny (59 countries x 13 years), which hides how each stage
+scales. ``synthesize_like`` takes a real file as a template and writes a table
+with the same columns, dtypes and missing-value rates for any number of
+countries, years and extra indicators. Every numeric column follows the
+template's mean/std and is clipped to its observed range. Each value is a
+per-country level plus a small yearly drift, so group-bys, quantile bins and
+merges behave like they do on real data.
+
+``write_synthetic_inputs`` produces matching ``main.csv``, ``gdp.csv`` and
+combined files whose keys line up, so the GDP merge finds its matches.
+"""
+
+import argparse
+import os
+import string
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+COMBINED_CSV = os.path.join(CURRENT_DIR, "combined_urbanization_life_quality_2008_2020.csv")
+MAIN_CSV = os.path.join(CURRENT_DIR, "main.csv")
+GDP_CSV = os.path.join(CURRENT_DIR, "gdp.csv")
+
+REAL_COUNTRIES = 59
+REAL_YEARS = 13
+FIRST_YEAR = 2008
+
+# Key column names per template; gdp.csv uses lowercase keys
+KEY_NAMES = {
+    "country": ("Country", "country"),
+    "code": ("Country_Code", "country_code"),
+    "year": ("Year", "year"),
+}
+
+
+def country_code(i: int) -> str:
+    """Three (or more) upper-case letters, unique per index: AAA, AAB, ..."""
+
+    letters = string.ascii_uppercase
+    chars = []
+    while True:
+        i, rem = divmod(i, 26)
+        chars.append(letters[rem])
+        if i == 0 and len(chars) >= 3:
+            break
+    return "".join(reversed(chars))
+
+
+def _key(template: pd.DataFrame, kind: str) -> Optional[str]:
+    return next((name for name in KEY_NAMES[kind] if name in template.columns), None)
+
+
+def synthesize_like(
+    template: pd.DataFrame,
+    countries: int,
+    years: int,
+    first_year: int = FIRST_YEAR,
+    extra_indicators: int = 0,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """A ``countries x years`` table with the template's schema.
+
+    ``extra_indicators`` appends that many additional numeric columns
+    (``indicator_001`` ...) modelled on randomly chosen template columns.
+    Country ids are stable across calls, so tables generated with different
+    sizes share their first countries.
+    """
+
+    rng = np.random.default_rng(seed)
+    country_col, code_col, year_col = (_key(template, k) for k in ("country", "code", "year"))
+    keys = {c for c in (country_col, code_col, year_col) if c}
+
+    ids = np.arange(countries)
+    n_rows = countries * years
+    country_idx = np.repeat(np.arange(countries), years)
+    year_values = np.tile(np.arange(first_year, first_year + years), countries)
+
+    out: Dict[str, object] = {}
+    if country_col:
+        out[country_col] = np.array([f"Synthland {i:06d}" for i in ids], dtype=object)[country_idx]
+    if code_col:
+        out[code_col] = np.array([country_code(i) for i in ids], dtype=object)[country_idx]
+    if year_col:
+        out[year_col] = year_values
+
+    numeric = [c for c in template.columns if c not in keys and pd.api.types.is_numeric_dtype(template[c])]
+    sources = [(c, c) for c in numeric] + [
+        (f"indicator_{j + 1:03d}", numeric[rng.integers(len(numeric))]) for j in range(extra_indicators)
+    ]
+
+    for name in template.columns:
+        if name in keys or name in numeric:
+            continue
+        # Text columns (e.g. Cluster_Label): one value per country from the template's values
+        choices = template[name].dropna().unique()
+        per_country = rng.choice(choices, size=countries) if len(choices) else np.full(countries, None)
+        out[name] = per_country[country_idx]
+
+    for name, src in sources:
+        col = template[src].astype("float64")
+        valid = col.dropna()
+        if valid.empty:
+            out[name] = np.full(n_rows, np.nan)
+            continue
+        mean, std = valid.mean(), valid.std(ddof=0) or 1.0
+        level = rng.normal(mean, std * 0.9, size=countries)[country_idx]
+        drift = rng.normal(0.0, std * 0.1, size=n_rows)
+        values = np.clip(level + drift, valid.min(), valid.max())
+        values[rng.random(n_rows) < col.isna().mean()] = np.nan
+        if pd.api.types.is_integer_dtype(template[src]):
+            values = np.round(values).astype(template[src].dtype)
+        out[name] = values
+
+    order = [c for c in template.columns if c in out] + [name for name, _ in sources[len(numeric):]]
+    return pd.DataFrame(out)[order]
+
+
+def write_synthetic_inputs(
+    out_dir: str,
+    countries: int = REAL_COUNTRIES,
+    years: int = REAL_YEARS,
+    extra_indicators: int = 0,
+    seed: int = 0,
+) -> Dict[str, str]:
+    """Write synthetic ``main.csv``, ``gdp.csv`` and combined CSVs; returns their paths.
+
+    Like the real files, ``gdp.csv`` covers more countries (about 4.5x) and
+    years (from 2000) than the base table.
+    """
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {
+        "main": os.path.join(out_dir, "main.csv"),
+        "gdp": os.path.join(out_dir, "gdp.csv"),
+        "combined": os.path.join(out_dir, "combined.csv"),
+    }
+
+    combined = synthesize_like(
+        pd.read_csv(COMBINED_CSV), countries, years, extra_indicators=extra_indicators, seed=seed
+    )
+    combined.to_csv(paths["combined"], index=False)
+
+    main = synthesize_like(
+        pd.read_csv(MAIN_CSV), countries, years, extra_indicators=extra_indicators, seed=seed + 1
+    )
+    main.to_csv(paths["main"], index=False)
+
+    gdp_years = years + (FIRST_YEAR - 2000)
+    gdp_countries = int(round(countries * 4.5))
+    gdp = synthesize_like(pd.read_csv(GDP_CSV), gdp_countries, gdp_years, first_year=2000, seed=seed + 2)
+    gdp.to_csv(paths["gdp"], index=False)
+
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic pipeline inputs.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiple of the real country count")
+    parser.add_argument("--countries", type=int, help="Overrides --scale")
+    parser.add_argument("--years", type=int, default=REAL_YEARS)
+    parser.add_argument("--extra-indicators", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    countries = args.countries or max(1, int(round(REAL_COUNTRIES * args.scale)))
+    paths = write_synthetic_inputs(args.out_dir, countries, args.years, args.extra_indicators, args.seed)
+    for name, path in paths.items():
+        print(f"✓ {name}: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
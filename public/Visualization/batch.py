@@ -0,0 +1,316 @@
+"""
+Per-country batch rendering with reusable figure templates.
+
+Building a Matplotlib figure and re-applying all of the axis labels, ticks,
+grid, spines and formatters is the dominant cost when going from a handful of
+global charts to hundreds of per-country ones. A ``ChartTemplate`` builds that
+scaffolding once; ``update`` only swaps the line/area data, the axis limits
+and the title for the next country before the figure is saved again.
+
+Countries are split across worker processes and each worker builds its own
+set of templates once, then loops over its share of the countries. Given a
+memory-mapped ``PanelCube`` instead of a DataFrame, workers receive only the
+cube's folder and country codes and slice each country's rows as views of the
+shared mapping.
+"""
+
+import os
+import re
+import sys
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data"))
+if DATA_DIR not in sys.path:
+    sys.path.append(DATA_DIR)
+
+from cube import PanelCube  # noqa: E402
+from render import DEFAULT_SAVEFIG  # noqa: E402
+
+# Canonical column names (see public/Data/dataset.py)
+RENEWABLE_COL = "ren_energy_cons_perc"
+URBAN_COL = "urban_pop_perc"
+
+
+def country_slug(name: str) -> str:
+    """Return a filesystem-safe file stem for a country name."""
+
+    return re.sub(r"[^0-9a-zA-Z]+", "_", str(name)).strip("_").lower() or "unknown"
+
+
+def year_span(years) -> str:
+    """Return the ``first-last`` label for the years a chart covers."""
+
+    return f"{int(np.min(years))}-{int(np.max(years))}"
+
+
+def _style_axis(ax, spine_color: str) -> None:
+    ax.set_xlabel("Year", fontsize=14, fontweight="bold", labelpad=10)
+    ax.grid(True, which="major", linestyle="-", linewidth=0.8, color="#CCCCCC", alpha=0.5)
+    ax.grid(True, which="minor", linestyle="--", linewidth=0.5, color="#E0E0E0", alpha=0.3)
+    ax.spines["top"].set_visible(False)
+    ax.spines["left"].set_color(spine_color)
+    ax.spines["bottom"].set_color("#666666")
+
+
+def _set_years(ax, years) -> None:
+    """Fit the x axis, ticks and limits, to one country's years."""
+
+    first, last = int(np.min(years)), int(np.max(years))
+    # Keep at most ~8 labelled years whatever the span (2 for 2008-2020)
+    step = next((s for s in (1, 2, 5, 10) if (last - first) / s <= 8), 20)
+    ax.set_xticks(range(first + (-first) % step, last + 1, step))
+    ax.set_xticks(range(first, last + 1), minor=True)
+    ax.set_xlim(first - 0.5, last + 0.5)
+
+
+def _marker_line(ax, color: str, marker: str = "o", **kwargs):
+    (line,) = ax.plot(
+        [],
+        [],
+        color=color,
+        linewidth=2.5,
+        marker=marker,
+        markersize=6,
+        markerfacecolor=color,
+        markeredgecolor="white",
+        markeredgewidth=1,
+        **kwargs,
+    )
+    return line
+
+
+class ChartTemplate(ABC):
+    """A styled figure that is built once and re-filled per country."""
+
+    def __init__(self, style: Dict[str, Any]):
+        self.style = style
+        self.fig, self.ax = plt.subplots(figsize=style["figsize"])
+        self._fill = None
+        self.title = self.ax.set_title("", fontsize=16, fontweight="bold", pad=20)
+        self.setup()
+        self.fig.tight_layout()
+
+    @abstractmethod
+    def setup(self) -> None:
+        """Create the artists and axis styling shared by every country."""
+
+    @abstractmethod
+    def update(self, country: str, frame: pd.DataFrame) -> bool:
+        """Swap in one country's data. Returns False when there is nothing to plot."""
+
+    def _refill(self, x, y0, y1, **kwargs) -> None:
+        # fill_between has no set_data, so only the area collection is replaced
+        # and the data limits are recomputed so earlier countries do not linger
+        if self._fill is not None:
+            self._fill.remove()
+        self.ax.relim()
+        self._fill = self.ax.fill_between(x, y0, y1, linewidth=0, **kwargs)
+
+    def save(self, path: str, **savefig_kwargs) -> None:
+        self.fig.savefig(path, **savefig_kwargs)
+
+    def close(self) -> None:
+        plt.close(self.fig)
+
+
+class TrajectoryTemplate(ChartTemplate):
+    """Renewable energy share as a focused-range area chart."""
+
+    def setup(self) -> None:
+        _style_axis(self.ax, self.style["line"])
+        self.ax.spines["right"].set_visible(False)
+        self.ax.set_ylabel("Renewable Energy Consumption (%)", fontsize=14, fontweight="bold", labelpad=10)
+        self.ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f"{x:.1f}"))
+        self.line = _marker_line(self.ax, self.style["line"])
+
+    def update(self, country: str, frame: pd.DataFrame) -> bool:
+        data = frame[["year", RENEWABLE_COL]].dropna()
+        if data.empty:
+            return False
+        x, y = data["year"].to_numpy(), data[RENEWABLE_COL].to_numpy()
+
+        y_range = max(y.max() - y.min(), 1e-6)
+        y_bottom = max(0, y.min() - y_range * 0.3)
+        y_top = y.max() + y_range * 0.3
+
+        self.line.set_data(x, y)
+        self._refill(x, y_bottom, y, color=self.style["fill"], alpha=0.4)
+        self.ax.set_ylim(y_bottom, y_top)
+        _set_years(self.ax, x)
+        self.title.set_text(
+            f"{country}: Renewable Energy Consumption Trajectory ({year_span(x)})\n"
+            "Percentage of Total Energy Consumption"
+        )
+        return True
+
+
+class DualAxisTemplate(ChartTemplate):
+    """Renewable energy share with an urbanization overlay on a twin axis."""
+
+    def setup(self) -> None:
+        style = self.style
+        _style_axis(self.ax, style["renewable_line"])
+        self.twin = self.ax.twinx()
+        self.twin.spines["top"].set_visible(False)
+        self.twin.spines["right"].set_color(style["urban_line"])
+        self.ax.set_ylabel(
+            "Renewable Energy Consumption (%)", fontsize=14, fontweight="bold",
+            labelpad=10, color=style["renewable_line"],
+        )
+        self.twin.set_ylabel(
+            "Urbanization (%)", fontsize=14, fontweight="bold", labelpad=10, color=style["urban_line"]
+        )
+        self.ax.tick_params(axis="y", labelcolor=style["renewable_line"])
+        self.twin.tick_params(axis="y", labelcolor=style["urban_line"])
+
+        self.line = _marker_line(self.ax, style["renewable_line"], label="Renewable Energy Consumption (%)")
+        self.urban = _marker_line(self.twin, style["urban_line"], marker="s", label="Urbanization (%)")
+        self.ax.legend(
+            [self.line, self.urban], [self.line.get_label(), self.urban.get_label()],
+            loc="upper left", fontsize=11, framealpha=0.9,
+        )
+
+    def update(self, country: str, frame: pd.DataFrame) -> bool:
+        data = frame[["year", RENEWABLE_COL, URBAN_COL]].dropna()
+        if data.empty:
+            return False
+        x = data["year"].to_numpy()
+        renewable, urban = data[RENEWABLE_COL].to_numpy(), data[URBAN_COL].to_numpy()
+
+        self.line.set_data(x, renewable)
+        self.urban.set_data(x, urban)
+        self._refill(x, 0, renewable, color=self.style["renewable_fill"], alpha=0.3)
+        self.ax.set_ylim(0, max(renewable.max() + 2, 30))
+        self.twin.set_ylim(urban.min() - 2, urban.max() + 2)
+        _set_years(self.ax, x)
+        self.title.set_text(f"{country}: Renewable Energy and Urbanization Trends ({year_span(x)})")
+        return True
+
+
+class YoYChangeTemplate(ChartTemplate):
+    """Year-over-year change in the renewable energy share."""
+
+    def setup(self) -> None:
+        _style_axis(self.ax, "#666666")
+        self.ax.spines["right"].set_visible(False)
+        self.ax.set_ylabel(
+            "Year-over-Year Change (Percentage Points)", fontsize=14, fontweight="bold", labelpad=10
+        )
+        self.ax.axhline(y=0, color="black", linestyle="-", linewidth=1.5, alpha=0.7)
+        self.ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f"{x:.2f}"))
+        self.line = _marker_line(self.ax, self.style["line"])
+
+    def update(self, country: str, frame: pd.DataFrame) -> bool:
+        data = frame[["year", RENEWABLE_COL]].dropna().sort_values("year")
+        years = data["year"].to_numpy()
+        # A change across a missing year is not an annual change; leave it NaN
+        consecutive = np.diff(years) == 1
+        if not consecutive.any():
+            return False
+        x = years[1:]
+        change = np.where(consecutive, np.diff(data[RENEWABLE_COL].to_numpy(dtype=float)), np.nan)
+
+        limit = float(np.nanmax(np.abs(change))) + 0.5
+        self.line.set_data(x, change)
+        self._refill(x, 0, change, color=self.style["fill"], alpha=0.4)
+        self.ax.set_ylim(-limit, limit)
+        _set_years(self.ax, years)
+        self.title.set_text(
+            f"{country}: Renewable Energy Consumption, Annual Change ({year_span(years)})"
+        )
+        return True
+
+
+TEMPLATES = {
+    "trajectory": TrajectoryTemplate,
+    "dual_axis": DualAxisTemplate,
+    "yoy_change": YoYChangeTemplate,
+}
+
+
+def _render_chunk(
+    charts: Sequence[str],
+    styles: Dict[str, Dict[str, Any]],
+    items: Sequence[Tuple[str, Union[pd.DataFrame, str]]],
+    out_dir: str,
+    savefig_kwargs: Dict[str, Any],
+    cube: Optional[PanelCube] = None,
+) -> int:
+    """Worker entry point: build each template once, then loop over countries.
+
+    With a ``cube``, items carry country codes and the frames are sliced here.
+    """
+
+    matplotlib.use("Agg")
+    templates = {name: TEMPLATES[name](styles[name]) for name in charts}
+    saved = 0
+    try:
+        for country, frame in items:
+            if cube is not None:
+                frame = cube.frame(country=frame)
+            slug = country_slug(country)
+            for name, template in templates.items():
+                if template.update(country, frame):
+                    template.save(os.path.join(out_dir, name, f"{slug}.png"), **savefig_kwargs)
+                    saved += 1
+    finally:
+        for template in templates.values():
+            template.close()
+    return saved
+
+
+def render_per_country(
+    panel: Union[pd.DataFrame, PanelCube],
+    out_dir: str,
+    styles: Dict[str, Dict[str, Any]],
+    charts: Optional[Sequence[str]] = None,
+    processes: Optional[int] = None,
+    savefig_kwargs: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Render every chart type for every country in ``panel``.
+
+    ``panel`` needs ``country`` and ``year`` columns plus the indicator
+    columns used by the templates, or is a ``PanelCube`` holding those
+    indicators. Output lands in ``out_dir/<chart>/<country>.png``.
+    Returns the number of PNGs written.
+    """
+
+    charts = list(charts or TEMPLATES)
+    savefig_kwargs = dict(savefig_kwargs or DEFAULT_SAVEFIG)
+    for name in charts:
+        os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+
+    cube = panel if isinstance(panel, PanelCube) else None
+    items: List[Tuple[str, Union[pd.DataFrame, str]]]
+    if cube is not None:
+        items = sorted(zip(cube.names, cube.codes))
+    else:
+        items = [
+            (str(country), frame.sort_values("year"))
+            for country, frame in panel.groupby("country", sort=True, observed=True)
+        ]
+    if not items:
+        return 0
+
+    workers = max(1, min(len(items), processes or os.cpu_count() or 1))
+    if workers == 1:
+        return _render_chunk(charts, styles, items, out_dir, savefig_kwargs, cube)
+
+    # Round-robin split keeps chunk sizes balanced
+    chunks = [items[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_render_chunk, charts, styles, chunk, out_dir, savefig_kwargs, cube)
+            for chunk in chunks
+        ]
+        return sum(f.result() for f in futures)
@@ -0,0 +1,208 @@
+"""
+Export chart-ready aggregates for the Next.js dashboard as small JSON files.
+
+The crime heatmap, renewable-energy area chart and urbanization bar chart used
+to re-derive bins, min/max normalisation and yearly means from the full
+``DataRecord[]`` on every client render. This stage computes the same numbers
+once with the Python helpers (``heatmap.build_indicator_cube`` for the
+inequality x urbanization grid, ``aggregates.aggregate`` for weighted yearly
+and grouped means) and writes them under ``public/chart-data/v<N>/``.
+
+JSON keys follow the ``DataRecord`` field names in lib/loadData.ts so the
+components can use the files directly. Bump ``SCHEMA_VERSION`` whenever the
+shape of a file changes.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+if CURRENT_DIR not in sys.path:
+    sys.path.append(CURRENT_DIR)
+
+DATA_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "Data"))
+if DATA_DIR not in sys.path:
+    sys.path.append(DATA_DIR)
+
+from aggregates import aggregate  # noqa: E402
+from cache import file_sha256  # noqa: E402
+from dataset import load_table  # noqa: E402
+from heatmap import build_indicator_cube  # noqa: E402
+
+SCHEMA_VERSION = 1
+DEFAULT_CSV = os.path.join(DATA_DIR, "combined_urbanization_life_quality_2008_2020.csv")
+DEFAULT_OUT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", "chart-data"))
+
+URBAN_COL = "urban_pop_perc"
+RENEWABLE_COL = "ren_energy_cons_perc"
+POPULATION_COL = "total_pop"
+
+# DataRecord key -> (label shown in the dashboard, canonical column)
+CRIME_HEATMAP_INDICATORS: Dict[str, tuple] = {
+    "perceptionsOfCriminality": ("Perceptions of criminality", "perceptions_of_criminality"),
+    "homicideRate": ("Homicide rate", "homicide_rate"),
+    "violentCrime": ("Violent crime", "violent_crime"),
+    "violentDemonstrations": ("Violent demonstrations", "violent_demonstrations"),
+    "accessToSmallArms": ("Access to small arms", "access_to_small_arms"),
+    "safetyAndSecurity": ("Safety & security (higher = less safe)", "safety_and_security"),
+}
+
+# Display name -> canonical column, in the order of UrbanizationBarChart's indicatorMap
+URBANIZATION_BAR_INDICATORS: Dict[str, str] = {
+    "violence score": "overall_score",
+    "ongoing conflict": "ongoing_conflict",
+    "Political instability": "political_instability",
+    "intensity of internal conflict": "intensity_of_internal_conflict",
+    "Instability_Index": "internal_peace",
+    "defense capacity": "militarisation",
+    "weapons exports": "weapons_exports",
+    "weapons imports": "weapons_imports",
+    "nuclear and heavy weapons": "nuclear_heavy_weapons",
+}
+URBAN_GROUPS: List[str] = [
+    "Low Urbanization (<50%)",
+    "Medium Urbanization (50-75%)",
+    "High Urbanization (>75%)",
+]
+
+
+def _rounded_grid(values: np.ndarray, decimals: int = 6) -> List[List[Optional[float]]]:
+    """Round a 2-D grid for a compact payload; NaN becomes null."""
+
+    rounded = np.round(np.asarray(values, dtype="float64"), decimals)
+    return [[None if np.isnan(v) else float(v) for v in row] for row in rounded]
+
+
+def crime_heatmap(df: pd.DataFrame) -> Dict:
+    """Inequality tertile x urbanization tertile means for each crime indicator."""
+
+    indicator_map = {key: col for key, (_, col) in CRIME_HEATMAP_INDICATORS.items()}
+    cube = build_indicator_cube(df, indicator_map)
+
+    cells = {}
+    for k, key in enumerate(cube.indicators):
+        means = cube.mean[..., k]
+        positive = means[np.isfinite(means) & (means > 0)]
+        cells[key] = {
+            "means": _rounded_grid(means),
+            "counts": cube.count[..., k].tolist(),
+            "minValue": float(positive.min()) if positive.size else 0.0,
+            "maxValue": float(positive.max()) if positive.size else 1.0,
+        }
+
+    return {
+        "rowOrder": cube.row_labels,
+        "colOrder": cube.col_labels,
+        "indicators": [
+            {"key": key, "label": CRIME_HEATMAP_INDICATORS[key][0]} for key in cube.indicators
+        ],
+        "cells": cells,
+    }
+
+
+def renewable_energy(df: pd.DataFrame) -> Dict:
+    """Population-weighted yearly renewable energy share."""
+
+    frame = df[["year", RENEWABLE_COL, POPULATION_COL]]
+    frame = frame[frame[POPULATION_COL] > 0]
+    yearly = aggregate(frame, by=["year"], weight=POPULATION_COL, columns=[RENEWABLE_COL])
+    yearly = yearly[yearly[(RENEWABLE_COL, "count")] > 0]
+
+    return {
+        "yearly": [
+            {
+                "year": int(year),
+                "renewableEnergyPercent": round(float(row[(RENEWABLE_COL, "wmean")]), 6),
+                "totalPopulation": float(row[(RENEWABLE_COL, "wsum")]),
+            }
+            for year, row in yearly.iterrows()
+        ]
+    }
+
+
+def urbanization_bars(df: pd.DataFrame) -> Dict:
+    """Mean min-max normalised security indicators per urbanization group."""
+
+    frame = df[df[URBAN_COL].notna()]
+    columns = list(URBANIZATION_BAR_INDICATORS.values())
+    values = frame[columns].astype("float64")
+
+    # Normalise over all rows first (like sklearn's MinMaxScaler), then group
+    lo, hi = values.min(), values.max()
+    span = hi - lo
+    normalized = (values - lo) / span.where(span > 0)
+    normalized = normalized.where(values.isna() | (span > 0), 0.5)
+
+    group = np.select(
+        [frame[URBAN_COL] < 50, frame[URBAN_COL] < 75], URBAN_GROUPS[:2], URBAN_GROUPS[2]
+    )
+    grouped = aggregate(normalized.assign(urbanGroup=group), by=["urbanGroup"], columns=columns)
+    grouped = grouped.reindex(URBAN_GROUPS)
+
+    rows = []
+    for name, col in URBANIZATION_BAR_INDICATORS.items():
+        row: Dict[str, object] = {"indicator": name}
+        for label in URBAN_GROUPS:
+            mean = grouped.loc[label, (col, "mean")]
+            row[label] = 0.0 if pd.isna(mean) else round(float(mean), 6)
+        rows.append(row)
+    return {"groups": URBAN_GROUPS, "chartData": rows}
+
+
+EXPORTS = {
+    "crime-heatmap.json": crime_heatmap,
+    "renewable-energy.json": renewable_energy,
+    "urbanization-bars.json": urbanization_bars,
+}
+
+
+def export_chart_data(
+    csv_path: str = DEFAULT_CSV, out_root: Optional[str] = None, df: Optional[pd.DataFrame] = None
+) -> str:
+    """Write every chart payload plus a manifest; returns the output directory.
+
+    ``df`` is the already loaded table of ``csv_path`` (full precision), if any.
+    """
+
+    out_dir = os.path.join(out_root or DEFAULT_OUT_ROOT, f"v{SCHEMA_VERSION}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Full precision keeps the exported numbers identical to the CSV's
+    if df is None:
+        df = load_table(csv_path, compact=False)
+    manifest = {
+        "version": SCHEMA_VERSION,
+        "source": os.path.basename(csv_path),
+        "source_sha256": file_sha256(csv_path),
+        "files": sorted(EXPORTS),
+    }
+    for fname, build in EXPORTS.items():
+        payload = {"version": SCHEMA_VERSION, **build(df)}
+        with open(os.path.join(out_dir, fname), "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, separators=(",", ":"))
+
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+
+    return out_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export chart-ready aggregates as JSON.")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--out", default=DEFAULT_OUT_ROOT, help="Root folder; files go to <out>/v<N>/")
+    args = parser.parse_args()
+
+    out_dir = export_chart_data(args.csv, args.out)
+    sizes = {f: os.path.getsize(os.path.join(out_dir, f)) for f in EXPORTS}
+    print(f"Chart data written to {out_dir}: " + ", ".join(f"{f} ({n} B)" for f, n in sizes.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Export per-year choropleth layers for the globe viewers as packed binary arrays.
+
+For every indicator this writes one dense year x country array of
+little-endian float32 values (``<key>.f32``), where a missing cell is NaN. The
+browser wraps the file directly in a ``Float32Array`` without parsing, and
+because the layout is year-major, one year of the globe is the contiguous
+slice ``[yearIndex * countries, (yearIndex + 1) * countries)``.
+
+``manifest.json`` lists the country names and ISO3 codes (the column index),
+each country's cluster label when the source has one, the years (the row
+index), and each indicator's file, DataRecord key and value range for colour
+scales. NaN already marks a missing cell, so there is no separate mask.
+
+Indicator keys follow the ``DataRecord`` field names in lib/loadData.ts. Files
+go to ``public/chart-data/choropleth/v<N>/``; lib/choropleth.ts reads them.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "Data"))
+if DATA_DIR not in sys.path:
+    sys.path.append(DATA_DIR)
+
+from aggregates import numeric_columns  # noqa: E402
+from cache import file_sha256  # noqa: E402
+from dataset import DEFAULT_CSV, ID_COLUMNS, header_map, load_table  # noqa: E402
+
+SCHEMA_VERSION = 1
+DEFAULT_OUT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", "chart-data", "choropleth"))
+
+
+def record_key(column: str) -> str:
+    """DataRecord field name for a canonical column (``total_pop`` -> ``totalPop``)."""
+
+    head, *rest = column.split("_")
+    return head + "".join(part[:1].upper() + part[1:] for part in rest)
+
+
+def choropleth_cube(df: pd.DataFrame, columns: Sequence[str]) -> Dict:
+    """Scatter the panel into an (indicator, year, country) float32 cube."""
+
+    countries = df[["country", "country_code"]].astype(str).drop_duplicates("country")
+    countries = countries.sort_values("country", kind="stable")
+    country_index = pd.Index(countries["country"])
+    years = np.sort(df["year"].unique())
+
+    ci = country_index.get_indexer(df["country"].astype(str))
+    yi = np.searchsorted(years, df["year"].to_numpy())
+    cube = np.full((len(columns), len(years), len(country_index)), np.nan, dtype="<f4")
+    cube[:, yi, ci] = df[list(columns)].to_numpy(dtype="float64").T
+
+    labels = None
+    if "cluster_label" in df.columns:
+        # Labels are per country; the first labelled row of each country wins
+        first = df.dropna(subset=["cluster_label"]).drop_duplicates("country")
+        by_country = dict(zip(first["country"].astype(str), first["cluster_label"].astype(str)))
+        labels = [by_country.get(country) for country in country_index]
+
+    return {
+        "countries": countries["country"].tolist(),
+        "country_codes": countries["country_code"].tolist(),
+        "cluster_labels": labels,
+        "years": [int(y) for y in years],
+        "cube": cube,
+    }
+
+
+def export_choropleth(
+    csv_path: str = DEFAULT_CSV,
+    out_root: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    df: Optional[pd.DataFrame] = None,
+) -> str:
+    """Write one ``.f32`` layer per indicator and a manifest; returns the output directory.
+
+    ``df`` is the already loaded table of ``csv_path`` (full precision), if any.
+    """
+
+    out_dir = os.path.join(out_root or DEFAULT_OUT_ROOT, f"v{SCHEMA_VERSION}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    if df is None:
+        projection = columns
+        if columns and "cluster_label" in header_map(csv_path).values():
+            projection = [*columns, "cluster_label"]
+        df = load_table(csv_path, projection, compact=False)
+    columns = list(columns) if columns else numeric_columns(df, exclude=ID_COLUMNS)
+    packed = choropleth_cube(df, columns)
+    cube = packed["cube"]
+
+    indicators: List[Dict] = []
+    for k, column in enumerate(columns):
+        key = record_key(column)
+        fname = f"{key}.f32"
+        layer = cube[k]
+        with open(os.path.join(out_dir, fname), "wb") as fh:
+            fh.write(layer.tobytes())
+        finite = layer[np.isfinite(layer)]
+        indicators.append(
+            {
+                "key": key,
+                "column": column,
+                "file": fname,
+                "min": float(finite.min()) if finite.size else None,
+                "max": float(finite.max()) if finite.size else None,
+            }
+        )
+
+    manifest = {
+        "version": SCHEMA_VERSION,
+        "source": os.path.basename(csv_path),
+        "source_sha256": file_sha256(csv_path),
+        "dtype": "float32",
+        "byteOrder": "little",
+        "layout": "year-major",
+        "countries": packed["countries"],
+        "countryCodes": packed["country_codes"],
+        "clusterLabels": packed["cluster_labels"],
+        "years": packed["years"],
+        "indicators": indicators,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+
+    return out_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export per-year choropleth layers as packed float32 arrays.")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--out", default=DEFAULT_OUT_ROOT, help="Root folder; files go to <out>/v<N>/")
+    parser.add_argument("--columns", help="Comma-separated columns (default: every indicator)")
+    args = parser.parse_args()
+
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+    out_dir = export_choropleth(args.csv, args.out, columns)
+
+    with open(os.path.join(out_dir, "manifest.json"), "r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    binary = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+
+    # The same values as JSON records, the way the globe receives them today
+    df = load_table(args.csv, [i["column"] for i in manifest["indicators"]], compact=False)
+    df = df.rename(columns={i["column"]: i["key"] for i in manifest["indicators"]})
+    as_json = len(df.drop(columns=["country_code"]).to_json(orient="records").encode("utf-8"))
+    print(
+        f"✓ {len(manifest['indicators'])} layers of {len(manifest['years'])} years x "
+        f"{len(manifest['countries'])} countries -> {out_dir}"
+    )
+    print(f"✓ {binary / 1e3:.0f} KB packed vs {as_json / 1e3:.0f} KB as JSON records ({as_json / binary:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
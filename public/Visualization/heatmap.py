@@ -1,19 +1,35 @@
 import os
 import sys
-from typing import Dict, List
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
-# Allow running this script directly by adding the project root to sys.path
-CURRENT_DIR = os.path.dirname(os.path.abspath(_file_))
-PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", "..", "..", ".."))
-if PROJECT_ROOT not in sys.path:
-    sys.path.append(PROJECT_ROOT)
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "Data"))
+if DATA_DIR not in sys.path:
+    sys.path.append(DATA_DIR)
 
-from notebooks.haseeb.group2_crime_inequality.code.basic_trends_correlations import (  # type: ignore  # noqa: E501
-    load_and_merge_data,
-)
+from cube import load_cube  # noqa: E402
+from dataset import DEFAULT_CSV  # noqa: E402
+from instrument import stage  # noqa: E402
+from sketch import assign_bins, load_sketches  # noqa: E402
+
+# Binning columns, by their canonical names (see public/Data/dataset.py)
+GINI_COL = "gini_coefficient"
+URBAN_COL = "urban_pop_perc"
+
+# Mapping of human-readable labels to DataFrame column names
+CRIME_INDICATORS: Dict[str, str] = {
+    "Violent crime score": "violent_crime",
+    "Homicide rate": "homicide_rate",
+    "Perceptions of criminality": "perceptions_of_criminality",
+    "Violent demonstrations": "violent_demonstrations",
+    "Access to small arms": "access_to_small_arms",
+    "GPI safety & security (higher = less safe)": "safety_and_security",
+}
 
 
 def ensure_output_dir(base_path: str = ".") -> str:
@@ -36,60 +52,159 @@ def subdir(images_dir: str, name: str) -> str:
     return path
 
 
-def add_tertiles(df: pd.DataFrame) -> pd.DataFrame:
-    """Add inequality and urbanization tertile labels used for heatmaps.
+def bin_labels(n_bins: int, kind: str) -> List[str]:
+    """Return ordered labels for ``n_bins`` quantile bins of ``kind``.
 
-    This follows the static heatmap logic so that comparisons between the
-    Matplotlib version and the Plotly version are apples-to-apples.
+    Tertiles keep the historical "Low/Mid/High" labels so existing figures
+    are unchanged; finer bins are numbered from lowest to highest.
     """
 
-    out = df.copy()
-    out = out.dropna(subset=["gini_coef", "urban_pop_perc"])
+    noun = {"gini": "inequality", "urban": "urban"}[kind]
+    if n_bins == 3:
+        return [f"Low {noun}", f"Mid {noun}", f"High {noun}"]
+    return [f"{noun.capitalize()} Q{i + 1}/{n_bins}" for i in range(n_bins)]
 
-    out["gini_tertile"] = pd.qcut(
-        out["gini_coef"], 3, labels=["Low inequality", "Mid inequality", "High inequality"]
-    )
-    out["urban_tertile"] = pd.qcut(
-        out["urban_pop_perc"], 3, labels=["Low urban", "Mid urban", "High urban"]
-    )
 
-    return out
+def sketch_edges(csv_path: str = DEFAULT_CSV, n_bins: int = 3, year: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Gini/urbanization bin edges from cached streaming quantile sketches.
 
+    Unlike ``pd.qcut`` over the loaded frame, this never materializes the
+    columns: the sketches are built chunk by chunk on first use and read back
+    from ``public/Data/.cache/sketches`` afterwards. Each column's edges come
+    from all rows where that column is present.
+    """
 
-def build_indicator_pivots(
-    df: pd.DataFrame, indicator_map: Dict[str, str]
-) -> Dict[str, pd.DataFrame]:
-    """Return a pivoted 3x3 table for each crime/safety indicator.
+    sketches = load_sketches(csv_path, [GINI_COL, URBAN_COL])
+    return {col: sketches.edges(col, n_bins, group=year) for col in (GINI_COL, URBAN_COL)}
 
-    Rows: Gini tertiles (inequality level)
-    Cols: Urbanization tertiles (urbanization level)
-    Values: Mean of the chosen indicator.
+
+@dataclass
+class PivotCube:
+    """Gini bin x urban bin x indicator statistics, optionally per year.
+
+    ``mean``, ``count`` and ``std`` have shape (rows, cols, indicators), or
+    (years, rows, cols, indicators) when built with a year axis.
     """
 
-    df_tertiles = add_tertiles(df)
+    row_labels: List[str]
+    col_labels: List[str]
+    indicators: List[str]
+    mean: np.ndarray
+    count: np.ndarray
+    std: np.ndarray
+    years: Optional[List[int]] = None
 
-    row_order: List[str] = ["Low inequality", "Mid inequality", "High inequality"]
-    col_order: List[str] = ["Low urban", "Mid urban", "High urban"]
+    def pivot(self, indicator: str, stat: str = "mean", year: Optional[int] = None) -> pd.DataFrame:
+        """Return one (row bin x col bin) table from the cube."""
 
-    pivots: Dict[str, pd.DataFrame] = {}
-    for label, col in indicator_map.items():
-        if col not in df_tertiles.columns:
-            continue
-        pivot = (
-            df_tertiles.groupby(["gini_tertile", "urban_tertile"])[col]
-            .mean()
-            .unstack()
-        )
-        pivot = pivot.reindex(index=row_order, columns=col_order)
-        pivots[label] = pivot
+        values = getattr(self, stat)
+        if self.years is not None:
+            if year is None:
+                raise ValueError("This cube has a year axis; pass year=...")
+            values = values[self.years.index(year)]
+        k = self.indicators.index(indicator)
+        return pd.DataFrame(values[..., k], index=self.row_labels, columns=self.col_labels)
+
+
+def build_indicator_cube(
+    df: pd.DataFrame,
+    indicator_map: Dict[str, str],
+    gini_bins: int = 3,
+    urban_bins: int = 3,
+    by_year: bool = False,
+    year_col: str = "year",
+    edges: Optional[Dict[str, np.ndarray]] = None,
+) -> PivotCube:
+    """Bin once and aggregate every indicator in a single grouped pass.
+
+    Quantile bins are computed over the rows where both binning columns are
+    present; only the binning and indicator columns are touched instead of
+    copying the whole frame. Mean, count and
+    standard deviation for all indicators come out of one ``groupby().agg``.
+    ``edges`` replaces the quantile binning of a column with precomputed
+    edges (e.g. from :func:`sketch_edges`); their count must match the bins.
+    """
 
-    return pivots
+    labels = [label for label, col in indicator_map.items() if col in df.columns]
+    columns = [indicator_map[label] for label in labels]
+    row_labels = bin_labels(gini_bins, "gini")
+    col_labels = bin_labels(urban_bins, "urban")
+
+    mask = df[GINI_COL].notna() & df[URBAN_COL].notna()
+
+    def binned(col: str, n_bins: int) -> pd.Series:
+        values = df.loc[mask, col]
+        if edges and col in edges:
+            if len(edges[col]) != n_bins + 1:
+                raise ValueError(f"{col}: expected {n_bins + 1} edges, got {len(edges[col])}")
+            return pd.Series(assign_bins(values.to_numpy(), edges[col]), index=values.index)
+        return pd.qcut(values, n_bins, labels=False)
+
+    keys = {
+        "_gini_bin": binned(GINI_COL, gini_bins),
+        "_urban_bin": binned(URBAN_COL, urban_bins),
+    }
+    group_keys = ["_gini_bin", "_urban_bin"]
+    years: Optional[List[int]] = None
+    if by_year:
+        keys[year_col] = df.loc[mask, year_col]
+        group_keys = [year_col, *group_keys]
+        years = sorted(int(y) for y in keys[year_col].dropna().unique())
+
+    with stage("indicator_cube", rows=int(mask.sum())):
+        frame = pd.DataFrame(keys).join(df.loc[mask, columns])
+        stats = frame.groupby(group_keys)[columns].agg(["mean", "count", "std"])
+
+    # Reindex onto the full grid so empty cells show up as NaN / zero count
+    levels = [range(gini_bins), range(urban_bins)]
+    if by_year:
+        levels = [years, *levels]
+    full = pd.MultiIndex.from_product(levels, names=group_keys)
+    stats = stats.reindex(full)
+    shape = [len(level) for level in levels] + [len(columns)]
+
+    def block(stat: str) -> np.ndarray:
+        values = stats.xs(stat, axis=1, level=1)[columns].to_numpy(dtype="float64")
+        return values.reshape(shape)
+
+    return PivotCube(
+        row_labels=row_labels,
+        col_labels=col_labels,
+        indicators=labels,
+        mean=block("mean"),
+        count=np.nan_to_num(block("count")).astype("int64"),
+        std=block("std"),
+        years=years,
+    )
+
+
+def build_indicator_pivots(
+    df: pd.DataFrame,
+    indicator_map: Dict[str, str],
+    n_bins: int = 3,
+    edges: Optional[Dict[str, np.ndarray]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Return a pivoted bin table for each crime/safety indicator.
+
+    Rows: Gini bins (inequality level)
+    Cols: Urbanization bins (urbanization level)
+    Values: Mean of the chosen indicator.
+    """
+
+    cube = build_indicator_cube(df, indicator_map, gini_bins=n_bins, urban_bins=n_bins, edges=edges)
+    return {label: cube.pivot(label) for label in cube.indicators}
 
 
 def make_interactive_heatmap(
     df: pd.DataFrame,
     images_dir: str,
     fname: str = "interactive_crime_heatmap.html",
+    indicator_map: Optional[Dict[str, str]] = None,
+    n_bins: int = 3,
+    compact: bool = False,
+    decimals: int = 3,
+    include_plotlyjs: Optional[Union[bool, str]] = None,
+    edges: Optional[Dict[str, np.ndarray]] = None,
 ) -> str:
     """Create an interactive Plotly heatmap for multiple crime indicators.
 
@@ -97,19 +212,23 @@ def make_interactive_heatmap(
     on the x-axis, and lets the user switch the value layer between a set of
     crime/safety indicators (violent crime, homicide, perceptions of
     criminality, violent demonstrations, access to small arms, GPI safety).
+
+    With ``compact=True`` the figure is written by :func:`make_compact_heatmap`
+    instead, which keeps the HTML size roughly flat as indicators are added.
+    ``include_plotlyjs`` defaults to ``"directory"`` (the shared bundle) in
+    compact mode and to ``"cdn"`` otherwise.
     """
 
-    # Mapping of human-readable labels to DataFrame column names
-    indicator_map: Dict[str, str] = {
-        "Violent crime score": "violent_crime",
-        "Homicide rate": "homicide_rate",
-        "Perceptions of criminality": "perceptions_crime",
-        "Violent demonstrations": "violent_demonstrations",
-        "Access to small arms": "access_small_arms",
-        "GPI safety & security (higher = less safe)": "gpi_safety",
-    }
+    indicator_map = indicator_map or CRIME_INDICATORS
+    if compact:
+        return make_compact_heatmap(
+            df, images_dir, fname, indicator_map, n_bins, decimals,
+            "directory" if include_plotlyjs is None else include_plotlyjs, edges,
+        )
+    if include_plotlyjs is None:
+        include_plotlyjs = "cdn"
 
-    pivots = build_indicator_pivots(df, indicator_map)
+    pivots = build_indicator_pivots(df, indicator_map, n_bins=n_bins, edges=edges)
     if not pivots:
         raise ValueError("No valid pivots could be constructed from the dataframe.")
 
@@ -180,7 +299,95 @@ def make_interactive_heatmap(
 
     inter_dir = subdir(images_dir, "interactions")
     out_path = os.path.join(inter_dir, fname)
-    fig.write_html(out_path, include_plotlyjs="cdn", full_html=True)
+    with stage(f"write_html:{fname}") as s:
+        fig.write_html(out_path, include_plotlyjs=include_plotlyjs, full_html=True)
+        s.bytes = os.path.getsize(out_path)
+
+    return out_path
+
+
+def _compact_z(values: np.ndarray, decimals: int) -> List[List[Optional[float]]]:
+    """Round a z-matrix and turn NaN into null for a small JSON payload."""
+
+    rounded = np.round(values.astype("float64"), decimals)
+    return [[None if np.isnan(v) else float(v) for v in row] for row in rounded]
+
+
+def make_compact_heatmap(
+    df: pd.DataFrame,
+    images_dir: str,
+    fname: str = "interactive_crime_heatmap.html",
+    indicator_map: Optional[Dict[str, str]] = None,
+    n_bins: int = 3,
+    decimals: int = 3,
+    include_plotlyjs: Union[bool, str] = "directory",
+    edges: Optional[Dict[str, np.ndarray]] = None,
+) -> str:
+    """Write the crime heatmap as a single trace switched through ``update``.
+
+    Instead of one full ``go.Heatmap`` per indicator (each with its own
+    z-matrix, hover template and colorbar), the figure holds one trace and
+    every dropdown button only carries that indicator's rounded z-matrix and
+    label. The hover template reads the label from the trace's ``meta``, so
+    it is serialized once. ``include_plotlyjs="directory"`` writes a single
+    shared ``plotly.min.js`` next to the HTML files instead of embedding it.
+    """
+
+    cube = build_indicator_cube(
+        df, indicator_map or CRIME_INDICATORS, gini_bins=n_bins, urban_bins=n_bins, edges=edges
+    )
+    if not cube.indicators:
+        raise ValueError("No valid pivots could be constructed from the dataframe.")
+
+    z_by_label = {
+        label: _compact_z(cube.mean[..., k], decimals) for k, label in enumerate(cube.indicators)
+    }
+    first = cube.indicators[0]
+
+    fig = go.Figure(
+        go.Heatmap(
+            x=cube.col_labels,
+            y=cube.row_labels,
+            z=z_by_label[first],
+            meta=first,
+            colorscale="Reds",
+            colorbar=dict(title=dict(text=first)),
+            hovertemplate=(
+                "Inequality level: %{y}<br>"
+                "Urbanization level: %{x}<br>"
+                "%{meta}: %{z:.2f}<extra></extra>"
+            ),
+        )
+    )
+
+    buttons = [
+        dict(
+            label=label,
+            method="update",
+            args=[
+                {"z": [z], "meta": [label], "colorbar.title.text": label},
+                {"title.text": f"{label} by inequality/urbanization buckets"},
+            ],
+        )
+        for label, z in z_by_label.items()
+    ]
+
+    fig.update_layout(
+        title=f"{first} by inequality/urbanization buckets",
+        xaxis_title="Urbanization level",
+        yaxis_title="Inequality level",
+        yaxis=dict(autorange="reversed"),  # Keep low inequality at the top
+        updatemenus=[
+            dict(type="dropdown", direction="down", x=1.05, y=1, showactive=True, buttons=buttons)
+        ],
+        margin=dict(l=80, r=120, t=80, b=60),
+    )
+
+    inter_dir = subdir(images_dir, "interactions")
+    out_path = os.path.join(inter_dir, fname)
+    with stage(f"write_html:{fname}") as s:
+        fig.write_html(out_path, include_plotlyjs=include_plotlyjs, full_html=True)
+        s.bytes = os.path.getsize(out_path)
 
     return out_path
 
@@ -189,12 +396,15 @@ def main() -> None:
     base_path = "."
     images_dir = ensure_output_dir(base_path)
 
-    df = load_and_merge_data(base_path)
-    print(f"Merged rows (all): {len(df)}")
+    # Long view over the shared cube; cells absent from the CSV are all-NaN and fall out of the binning mask
+    cube = load_cube(DEFAULT_CSV, [GINI_COL, URBAN_COL, *CRIME_INDICATORS.values()])
+    df = cube.table()
+    print(f"Merged rows (all): {int(cube.mask.any(axis=2).sum())}")
 
-    out_path = make_interactive_heatmap(df, images_dir)
+    edges = sketch_edges(DEFAULT_CSV) if "--sketch" in sys.argv else None
+    out_path = make_interactive_heatmap(df, images_dir, compact="--compact" in sys.argv, edges=edges)
     print(f"Interactive crime heatmap saved to: {out_path}")
 
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Parallel, cache-aware rendering for independent Matplotlib figures.
+
+Each figure is described by a ``FigureJob``: a module-level draw function, the
+data slice it plots and the style parameters it uses. Jobs whose data, style
+and save options hash to the fingerprint recorded for an existing PNG are
+skipped; the rest are drawn in a process pool on the Agg backend and every
+figure is closed as soon as it has been saved.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data"))
+if DATA_DIR not in sys.path:
+    sys.path.append(DATA_DIR)
+
+from instrument import stage  # noqa: E402
+
+RENDER_VERSION = 1
+CACHE_FILE = ".render_cache.json"
+
+DEFAULT_SAVEFIG: Dict[str, Any] = {"dpi": 300, "bbox_inches": "tight", "facecolor": "white"}
+
+
+@dataclass
+class FigureJob:
+    """One independent figure to render.
+
+    ``draw`` must be a module-level function (so it can be sent to worker
+    processes) that takes ``(data, style)`` and returns a Matplotlib figure.
+    """
+
+    name: str
+    draw: Callable[[pd.DataFrame, Dict[str, Any]], Any]
+    data: pd.DataFrame
+    out_path: str
+    style: Dict[str, Any] = field(default_factory=dict)
+    savefig_kwargs: Dict[str, Any] = field(default_factory=lambda: dict(DEFAULT_SAVEFIG))
+
+    def fingerprint(self) -> str:
+        """Hash of everything that can change the rendered pixels."""
+
+        digest = hashlib.sha256()
+        digest.update(f"{RENDER_VERSION}:{self.draw.__module__}.{self.draw.__qualname__}".encode())
+        # Editing the draw function itself should also invalidate its PNGs
+        digest.update(self.draw.__code__.co_code)
+        digest.update(pd.util.hash_pandas_object(self.data, index=True).to_numpy().tobytes())
+        digest.update(json.dumps(list(self.data.columns), default=str).encode())
+        digest.update(json.dumps(self.style, sort_keys=True, default=str).encode())
+        digest.update(json.dumps(self.savefig_kwargs, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+
+def _load_cache(directory: str) -> Dict[str, str]:
+    path = os.path.join(directory, CACHE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _save_cache(directory: str, cache: Dict[str, str]) -> None:
+    with open(os.path.join(directory, CACHE_FILE), "w", encoding="utf-8") as fh:
+        json.dump(cache, fh, indent=2, sort_keys=True)
+
+
+def _init_worker() -> None:
+    matplotlib.use("Agg")
+
+
+def draw_and_save(job: FigureJob) -> str:
+    """Draw one job, save it and close the figure immediately."""
+
+    with stage(f"draw:{job.name}"):
+        fig = job.draw(job.data, job.style)
+    try:
+        with stage(f"savefig:{job.name}"):
+            fig.savefig(job.out_path, **job.savefig_kwargs)
+    finally:
+        plt.close(fig)
+    return job.out_path
+
+
+def render_figures(
+    jobs: Sequence[FigureJob],
+    processes: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, str]:
+    """Render all stale jobs, in parallel when there is more than one.
+
+    Returns ``{job name: "rendered" | "cached"}``. A job is cached when its
+    PNG exists and the fingerprint recorded next to it matches. Pass
+    ``processes=1`` to render in-process, e.g. when debugging a draw function.
+    """
+
+    caches: Dict[str, Dict[str, str]] = {}
+    status: Dict[str, str] = {}
+    stale: List[Tuple[FigureJob, str]] = []
+
+    for job in jobs:
+        directory = os.path.dirname(os.path.abspath(job.out_path))
+        cache = caches.setdefault(directory, _load_cache(directory))
+        fingerprint = job.fingerprint()
+        key = os.path.basename(job.out_path)
+        if not force and cache.get(key) == fingerprint and os.path.exists(job.out_path):
+            status[job.name] = "cached"
+        else:
+            stale.append((job, fingerprint))
+
+    if len(stale) > 1 and processes != 1:
+        workers = min(len(stale), processes or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            list(pool.map(draw_and_save, [job for job, _ in stale]))
+    else:
+        for job, _ in stale:
+            draw_and_save(job)
+
+    for job, fingerprint in stale:
+        directory = os.path.dirname(os.path.abspath(job.out_path))
+        caches[directory][os.path.basename(job.out_path)] = fingerprint
+        status[job.name] = "rendered"
+
+    for directory, cache in caches.items():
+        if cache:
+            _save_cache(directory, cache)
+
+    return status